@@ -19,12 +19,16 @@ from streamlit_echarts import st_echarts
 
 from src.pipeline import process_articles
 from src.sentiment_analysis.wordcloud import generate_wordcloud
-from src.utils.dbconnector import (append_to_document,
-                                   fetch_and_combine_articles, find_documents,
-                                   find_one_document)
+from src.utils.dbconnector import (append_to_document, ensure_indexes,
+                                   fetch_and_combine_articles, find_documents)
 from src.utils.logger import setup_logger
 
 logger = setup_logger()
+ensure_indexes()
+
+# Article fields used by the charts below; the scraped content is never loaded
+DASHBOARD_COLUMNS = ["keywords", "sentiment",
+                     "publishedat", "source", "urltoimage", "summary"]
 
 
 def download_images(image_urls, save_dir="downloaded_images"):
@@ -158,14 +162,11 @@ fetch_till = st.slider("Fetch articles till", 5, 100, 10)
 # Wait animation after submitting query
 if st.button("Submit"):
     with st.spinner("Processing data, please wait..."):
-        prev = find_one_document("News_Articles_Ids", {"query": query})
-        # st.write(prev)
-        if prev:
-            data = prev["ids"]
-        else:
-            data = process_articles(query, limit=fetch_till)
+        # Reuses fresh results; a stale query is refreshed with newer articles only
+        data = process_articles(query, limit=fetch_till)
     # st.write(data)
-    df = fetch_and_combine_articles("News_Articles", data)
+    df = fetch_and_combine_articles(
+        "News_Articles", data, columns=DASHBOARD_COLUMNS)
     st.success("Data processed successfully!")
     # st.write(df)
     # Column Layout
@@ -195,7 +196,6 @@ if st.button("Submit"):
     st.subheader("Time-wise Sentiment Distribution")
     # Normalize the sentiment values to lowercase
     df["sentiment"] = df["sentiment"].str.lower()
-    df["publishedat"] = pd.to_datetime(df["publishedat"])
 
     # Extract dates and aggregate sentiment counts
     time_data = df.pivot_table(
@@ -242,8 +242,6 @@ if st.button("Submit"):
         )
         st.plotly_chart(fig)
 
-    df["publishedat"] = pd.to_datetime(df["publishedat"])
-
     # Extract date only (without time) for grouping
     df["date"] = df["publishedat"].dt.date
 
@@ -6,15 +6,20 @@ import asyncio
 import json
 import os
 import sys
+from datetime import datetime, timedelta, timezone
 from typing import Dict, List
 from urllib.parse import urlparse
 
 import aiohttp
 import requests
-from bs4 import BeautifulSoup
-
-from src.utils.dbconnector import (append_to_document, content_manager,
-                                   find_documents)
+from dotenv import load_dotenv
+
+from src.ingestion.html_extraction import extract_content_async
+from src.ingestion.http_fetcher import ArticleFetcher, CircuitOpenError
+from src.utils.async_dbconnector import (AsyncBulkUpdater,
+                                         content_status_many_async,
+                                         find_documents_async)
+from src.utils.embedding_store import content_hash
 from src.utils.logger import setup_logger
 
 sys.path.append(os.path.abspath(os.path.join(
@@ -23,16 +28,62 @@ sys.path.append(os.path.abspath(os.path.join(
 sys.path.append(os.path.abspath(os.path.join(
     os.path.dirname(__file__), "..", "..")))
 
+load_dotenv()
 logger = setup_logger()
 
+# Age after which stored content is revalidated with a conditional GET
+CONTENT_REFRESH_TTL = timedelta(
+    hours=float(os.getenv("CONTENT_REFRESH_TTL_HOURS", 24)))
+
+# Fields computed from the content, cleared when a revalidated page's text has changed
+DERIVED_FIELDS = ["summary", "keywords", "sentiment", "sentiment_score"]
+
+
+async def stale_content_ids_async(article_ids, max_age=CONTENT_REFRESH_TTL):
+    """
+    Returns the articles whose content was fetched longer than max_age ago.
+
+    Content stored before fetch times were recorded counts as stale.
+
+    Args:
+        article_ids (List[str]): IDs of the articles to check.
+        max_age (datetime.timedelta): How long fetched content stays fresh.
 
-async def fetch_article_content(article_ids, session):
+    Returns:
+        List[str]: IDs of the articles with stale content.
+    """
+    cutoff = datetime.now(timezone.utc) - max_age
+    docs = await find_documents_async(
+        "News_Articles",
+        {
+            "id": {"$in": article_ids},
+            "content": {"$nin": [None, ""]},
+            "$or": [
+                {"fetched_at": {"$lt": cutoff}},
+                {"fetched_at": {"$exists": False}},
+            ],
+        },
+        {"_id": 0, "id": 1},
+    )
+    return [doc["id"] for doc in docs]
+
+
+async def fetch_article_content(article_ids, fetcher, refresh=False):
     """
     Fetches the content of a list of articles asynchronously, by checking if content already exists in the database, and if not, extracting the content from the given URLs.
 
+    The ETag and Last-Modified headers of each page, the fetch time and a hash
+    of the extracted text are stored with its content. With refresh=True,
+    articles that already have content are revalidated with a conditional GET
+    and re-extracted unless the server answers 304. Only if the extracted text
+    differs from the stored one are summary, keywords and sentiment cleared so
+    the pipeline computes them again; otherwise just the fetch time and
+    validators are updated.
+
     Args:
         article_ids (List[str]): List of IDs of the articles to fetch content for.
-        session (aiohttp.ClientSession): The aiohttp session to use for the request.
+        fetcher (ArticleFetcher): The open fetcher to use for the requests.
+        refresh (bool): Whether to revalidate articles that already have content.
 
     Returns:
         List[Dict[str, str]]: List of dictionaries, each containing the ID and content of a fetched article.
@@ -41,24 +92,51 @@ async def fetch_article_content(article_ids, session):
         # if not docs:
         #     raise ValueError(
         #         f"No documents found for article IDs: {article_ids}")
-        docs = find_documents("News_Articles", {"id": {"$in": article_ids}})
+        docs = await find_documents_async(
+            "News_Articles", {"id": {"$in": article_ids}}, {
+                "_id": 0, "id": 1, "url": 1, "etag": 1, "last_modified": 1,
+                "content_hash": 1}
+        )
+        # Check in one query whether content already exists for each article
+        content_status = await content_status_many_async(article_ids, ["content"])
+        # Content stored before hashes were recorded is hashed here, once
+        unhashed = [
+            doc["id"] for doc in docs
+            if refresh and content_status[doc["id"]]["content"] and not doc.get("content_hash")
+        ]
+        if unhashed:
+            legacy = await find_documents_async(
+                "News_Articles", {"id": {"$in": unhashed}}, {
+                    "_id": 0, "id": 1, "content": 1}
+            )
+            legacy_hashes = {doc["id"]: content_hash(doc.get("content"))
+                             for doc in legacy}
+            for doc in docs:
+                doc.setdefault("content_hash", legacy_hashes.get(doc["id"]))
     except Exception as e:
         logger.error(f"Failed to find documents: {e}")
         raise
 
     urls_to_fetch = []
+    # Hash of the stored text of each article being revalidated
+    stored_hashes = {}
 
-    # Check if content already exists for each article
     for doc in docs:
         id = doc["id"]
         url = doc["url"]
 
-        # Use the content manager to check if content already exists
-        field_status = content_manager(id, ["content"])
-
-        if not field_status["content"]:
+        if not content_status[id]["content"]:
             urls_to_fetch.append({"id": id, "url": url})
             logger.info(f"Fetching content for article {id}")
+        elif refresh:
+            urls_to_fetch.append({
+                "id": id,
+                "url": url,
+                "etag": doc.get("etag"),
+                "last_modified": doc.get("last_modified"),
+            })
+            stored_hashes[id] = doc.get("content_hash")
+            logger.info(f"Revalidating content for article {id}")
         else:
             logger.info(
                 f"Content already exists for article {id}. Skipping fetch.")
@@ -66,53 +144,66 @@ async def fetch_article_content(article_ids, session):
     article_contents = []
 
     # Define an asynchronous function to fetch content
-    async def fetch_content(id, url):
+    async def fetch_content(id, url, etag=None, last_modified=None):
         """
         Fetches the content of a single article asynchronously.
 
         Args:
             id (str): The ID of the article to fetch content for.
             url (str): The URL of the article to fetch content from.
+            etag (str, optional): Stored ETag of the page, for revalidation.
+            last_modified (str, optional): Stored Last-Modified of the page, for revalidation.
 
         Returns:
             None
         """
         try:
-            async with session.get(url) as response:
-                response.raise_for_status()
-                soup = BeautifulSoup(await response.text(), "html.parser")
-
-                # Extract the article content based on common HTML structure
-                article_content = ""
-
-                # Many articles have a <p> tag structure for paragraphs
-                paragraphs = soup.find_all("p")
-                if paragraphs:
-                    for p in paragraphs:
-                        article_content += p.get_text() + "\n"
-                else:
-                    # Fallback if no <p> tags found, try another structure, e.g., <div>
-                    divs = soup.find_all("div")
-                    for div in divs:
-                        article_content += div.get_text() + "\n"
-
-                # Clean up the content
-                article_content = article_content.strip()
-
-                article_obj = {"id": id, "content": article_content}
-                article_contents.append(article_obj)
-
-                # Save content to MongoDB
-                append_to_document("News_Articles", {"id": id}, article_obj)
-                logger.info(f"Content fetched and saved for article {id}")
+            result = await fetcher.fetch(url, etag, last_modified)
+            fetched_at = datetime.now(timezone.utc)
+            if result.not_modified:
+                logger.info(f"Article {id} is unchanged. Skipping extraction.")
+                await updater.update(id, {"fetched_at": fetched_at})
+                return
+
+            # Parse in the extraction process pool, off the event loop
+            article_content = await extract_content_async(result.text)
+            new_hash = content_hash(article_content)
+
+            # Queue validators (and content) for the bulk write to MongoDB
+            update = {
+                "etag": result.etag,
+                "last_modified": result.last_modified,
+                "fetched_at": fetched_at,
+                "content_hash": new_hash,
+            }
+            if id in stored_hashes and stored_hashes[id] == new_hash:
+                # Pages without validators always answer 200; same text, same results
+                await updater.update(id, update)
+                logger.info(f"Article {id} text is unchanged. Keeping its results.")
+                return
+
+            article_obj = {"id": id, "content": article_content}
+            article_contents.append(article_obj)
+            update.update(article_obj)
+            if id in stored_hashes:
+                update.update({field: None for field in DERIVED_FIELDS})
+            await updater.update(id, update)
+            logger.info(f"Content fetched and saved for article {id}")
+        except CircuitOpenError as e:
+            logger.info(f"Skipped article {id}: {e}")
         except Exception as e:
-            logger.error(f"Failed to fetch the article {id}: {e}")
-
-    # Run the fetch operations in parallel using aiohttp
-    tasks = [fetch_content(obj["id"], obj["url"]) for obj in urls_to_fetch]
-    await asyncio.gather(*tasks)
-
-    logger.info(f"Total articles content fetched: {len(article_contents)}")
+            logger.error(f"Failed to fetch the article {id}: {e!r}")
+
+    # Run the fetch operations concurrently; the fetcher bounds requests per host
+    async with AsyncBulkUpdater("News_Articles") as updater:
+        tasks = [fetch_content(**obj) for obj in urls_to_fetch]
+        await asyncio.gather(*tasks)
+
+    stats = fetcher.stats()
+    logger.info(
+        f"Total articles content fetched: {len(article_contents)} "
+        f"({stats['retries']} retries, {stats['skipped']} skipped by open circuits)"
+    )
     return article_contents
 
 
@@ -126,15 +217,15 @@ async def test_fetch_article_content(article_ids: List[str]) -> List[Dict[str, s
     Returns:
         List[Dict[str, str]]: A list of dictionaries where each dictionary contains the ID and content of a fetched article.
     """
-    async with aiohttp.ClientSession() as session:
-        contents = await fetch_article_content(article_ids, session)
+    async with ArticleFetcher() as fetcher:
+        contents = await fetch_article_content(article_ids, fetcher)
         logger.info(contents)  # Print the fetched content for verification
+    return contents
 
 
 if __name__ == "__main__":
-    url = "https://www.rt.com/india/602908-reclaiming-night-protests-over-rape/"
     article_ids = [
         "b01d85d7-d538-47cc-a7c4-31c13e7f6b4e",
         "15133cc7-1522-41f9-8db4-70568e837968",
     ]
-    asyncio.run(test_fetch_article_content())
+    asyncio.run(test_fetch_article_content(article_ids))
@@ -0,0 +1,564 @@
+"""
+HTTP fetcher for article pages.
+
+Wraps one aiohttp session with a tuned connection pool, per-host concurrency
+limits, connect/read timeouts, a ceiling on response size and conditional GET
+(ETag / Last-Modified) revalidation, so a single huge or hanging page cannot
+hold up a whole run.
+
+Transient failures (timeouts, dropped connections, 408/429/5xx) are retried
+with jittered exponential backoff. A per-domain circuit breaker stops sending
+requests to a publisher after repeated failures and lets a single probe
+through once its cool-down has passed.
+"""
+import asyncio
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import aiohttp
+from dotenv import load_dotenv
+from tenacity import (AsyncRetrying, retry_if_exception, stop_after_attempt,
+                      wait_exponential_jitter)
+
+from src.utils.logger import setup_logger
+
+load_dotenv()
+logger = setup_logger()
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (compatible; NewsAI/1.0)"
+FETCH_MAX_CONNECTIONS = int(os.getenv("FETCH_MAX_CONNECTIONS", 100))
+FETCH_MAX_PER_HOST = int(os.getenv("FETCH_MAX_PER_HOST", 4))
+FETCH_CONNECT_TIMEOUT = float(os.getenv("FETCH_CONNECT_TIMEOUT", 10))
+FETCH_READ_TIMEOUT = float(os.getenv("FETCH_READ_TIMEOUT", 20))
+FETCH_TOTAL_TIMEOUT = float(os.getenv("FETCH_TOTAL_TIMEOUT", 60))
+FETCH_MAX_BYTES = int(os.getenv("FETCH_MAX_BYTES", 5_000_000))
+FETCH_MAX_ATTEMPTS = int(os.getenv("FETCH_MAX_ATTEMPTS", 3))
+FETCH_MAX_BACKOFF = float(os.getenv("FETCH_MAX_BACKOFF", 10))
+FETCH_BREAKER_THRESHOLD = int(os.getenv("FETCH_BREAKER_THRESHOLD", 5))
+FETCH_BREAKER_COOLDOWN = float(os.getenv("FETCH_BREAKER_COOLDOWN", 300))
+
+# HTTP status codes worth retrying: timeouts, rate limiting and transient server errors
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+class ResponseTooLarge(Exception):
+    """
+    Raised when a response body exceeds the fetcher's byte ceiling.
+    """
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of sending a request to a domain whose circuit breaker is open.
+    """
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Decides whether a failed fetch should be retried.
+
+    Args:
+        error (BaseException): The error raised by the request.
+
+    Returns:
+        bool: True for timeouts, connection errors and retryable HTTP statuses.
+    """
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status in RETRYABLE_STATUS_CODES
+    return isinstance(error, (asyncio.TimeoutError, aiohttp.ClientConnectionError))
+
+
+class CircuitBreaker:
+    """
+    Per-domain circuit breaker.
+
+    A domain's circuit is closed while requests succeed. After failure_threshold
+    consecutive failures it opens and requests to the domain are skipped for
+    cooldown seconds; then it is half-open and lets one probe through, which
+    closes the circuit on success or re-opens it on failure.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = FETCH_BREAKER_THRESHOLD,
+                 cooldown: float = FETCH_BREAKER_COOLDOWN):
+        """
+        Args:
+            failure_threshold (int): Consecutive failures that open a domain's circuit.
+            cooldown (float): Seconds a circuit stays open before a probe is allowed.
+        """
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._domains = {}
+
+    def _domain(self, domain: str) -> dict:
+        """
+        Returns the mutable state of a domain. Caller holds the lock.
+        """
+        if domain not in self._domains:
+            self._domains[domain] = {
+                "state": self.CLOSED,
+                "failures": 0,
+                "opened_at": None,
+                "probing": False,
+                "skipped": 0,
+            }
+        return self._domains[domain]
+
+    def allow(self, domain: str, retry: bool = False) -> bool:
+        """
+        Decides whether a request to the domain may be sent, counting it as skipped if not.
+
+        Args:
+            domain (str): The host of the URL about to be fetched.
+            retry (bool): Whether this is a retry of a failed request, which the
+                caller counts as a failure rather than a skip when it is blocked.
+
+        Returns:
+            bool: True if the request may be sent.
+        """
+        with self._lock:
+            state = self._domain(domain)
+            if (
+                state["state"] == self.OPEN
+                and time.monotonic() - state["opened_at"] >= self.cooldown
+            ):
+                state["state"] = self.HALF_OPEN
+            if state["state"] == self.CLOSED:
+                return True
+            if state["state"] == self.HALF_OPEN and not state["probing"]:
+                state["probing"] = True
+                return True
+            if not retry:
+                state["skipped"] += 1
+            return False
+
+    def record_success(self, domain: str):
+        """
+        Closes the domain's circuit and resets its failure count.
+
+        Args:
+            domain (str): The host that answered.
+        """
+        with self._lock:
+            state = self._domain(domain)
+            state.update(state=self.CLOSED, failures=0,
+                         opened_at=None, probing=False)
+
+    def record_failure(self, domain: str):
+        """
+        Counts a failure, opening the domain's circuit at the threshold or after a failed probe.
+
+        Args:
+            domain (str): The host that failed.
+        """
+        with self._lock:
+            state = self._domain(domain)
+            state["failures"] += 1
+            if state["state"] == self.HALF_OPEN or state["failures"] >= self.failure_threshold:
+                if state["state"] != self.OPEN:
+                    logger.warning(
+                        f"Circuit opened for {domain} after {state['failures']} failures; "
+                        f"skipping it for {self.cooldown:.0f}s"
+                    )
+                state.update(state=self.OPEN,
+                             opened_at=time.monotonic(), probing=False)
+
+    def release(self, domain: str):
+        """
+        Ends a probe that finished without an outcome (e.g. it was cancelled), leaving the state as is.
+
+        The next request to a half-open domain is then let through as the new probe.
+
+        Args:
+            domain (str): The host that was probed.
+        """
+        with self._lock:
+            self._domain(domain)["probing"] = False
+
+    def state(self, domain: str) -> str:
+        """
+        Returns the circuit state of a domain, without counting a request.
+
+        Args:
+            domain (str): The host to look up.
+
+        Returns:
+            str: "closed", "open" or "half_open".
+        """
+        with self._lock:
+            state = self._domain(domain)
+            if (
+                state["state"] == self.OPEN
+                and time.monotonic() - state["opened_at"] >= self.cooldown
+            ):
+                return self.HALF_OPEN
+            return state["state"]
+
+    def stats(self) -> Dict[str, Dict[str, object]]:
+        """
+        Returns the breaker state of every domain seen so far.
+
+        Returns:
+            Dict[str, Dict[str, object]]: State, consecutive failures and skipped requests per domain.
+        """
+        return {
+            domain: {
+                "state": self.state(domain),
+                "failures": state["failures"],
+                "skipped": state["skipped"],
+            }
+            for domain, state in list(self._domains.items())
+        }
+
+
+@dataclass
+class FetchResult:
+    """
+    Outcome of a single page fetch.
+
+    Attributes:
+        url (str): The requested URL.
+        status (int): The HTTP status code.
+        text (Optional[str]): The decoded body; None when not_modified is set.
+        etag (Optional[str]): The ETag response header, for later revalidation.
+        last_modified (Optional[str]): The Last-Modified response header, for later revalidation.
+        not_modified (bool): True if the server answered 304 to a conditional request.
+    """
+
+    url: str
+    status: int
+    text: Optional[str] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    not_modified: bool = False
+
+
+def _decode(body: bytes, charset: Optional[str]) -> str:
+    """
+    Decodes a response body with its declared charset, defaulting to UTF-8.
+
+    Args:
+        body (bytes): The response body.
+        charset (str, optional): The charset from the Content-Type header.
+
+    Returns:
+        str: The decoded text; undecodable bytes are replaced.
+    """
+    try:
+        return body.decode(charset or "utf-8", errors="replace")
+    except LookupError:  # unknown charset name
+        return body.decode("utf-8", errors="replace")
+
+
+class ArticleFetcher:
+    """
+    Async context manager that owns the HTTP session used to fetch article pages.
+
+    Example:
+        async with ArticleFetcher() as fetcher:
+            result = await fetcher.fetch(url)
+    """
+
+    def __init__(
+        self,
+        limit: int = FETCH_MAX_CONNECTIONS,
+        limit_per_host: int = FETCH_MAX_PER_HOST,
+        connect_timeout: float = FETCH_CONNECT_TIMEOUT,
+        read_timeout: float = FETCH_READ_TIMEOUT,
+        total_timeout: float = FETCH_TOTAL_TIMEOUT,
+        max_bytes: int = FETCH_MAX_BYTES,
+        user_agent: str = DEFAULT_USER_AGENT,
+        max_attempts: int = FETCH_MAX_ATTEMPTS,
+        max_backoff: float = FETCH_MAX_BACKOFF,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        """
+        Args:
+            limit (int): Maximum open connections overall.
+            limit_per_host (int): Maximum requests in flight per host.
+            connect_timeout (float): Seconds allowed to establish a connection.
+            read_timeout (float): Seconds allowed between two reads of the body.
+            total_timeout (float): Seconds allowed for a whole request.
+            max_bytes (int): Largest response body accepted, in bytes.
+            user_agent (str): The User-Agent header sent with every request.
+            max_attempts (int): Attempts per URL, including the first, for retryable failures.
+            max_backoff (float): Upper bound in seconds of a single backoff wait.
+            breaker (CircuitBreaker, optional): Per-domain breaker. Defaults to a new one
+                configured from FETCH_BREAKER_THRESHOLD and FETCH_BREAKER_COOLDOWN.
+        """
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.timeout = aiohttp.ClientTimeout(
+            total=total_timeout, sock_connect=connect_timeout, sock_read=read_timeout
+        )
+        self.max_bytes = max_bytes
+        self.user_agent = user_agent
+        self.max_attempts = max_attempts
+        self.max_backoff = max_backoff
+        self.breaker = breaker or CircuitBreaker()
+        self.session = None
+        self._host_semaphores = {}
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            ttl_dns_cache=300,
+            enable_cleanup_closed=True,
+        )
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=self.timeout,
+            headers={"User-Agent": self.user_agent},
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.session.close()
+        self.session = None
+        return False
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        """
+        Returns the semaphore bounding concurrent requests to the URL's host.
+
+        Args:
+            url (str): The URL about to be fetched.
+
+        Returns:
+            asyncio.Semaphore: The semaphore for the host.
+        """
+        host = urlparse(url).netloc.lower()
+        if host not in self._host_semaphores:
+            self._host_semaphores[host] = asyncio.Semaphore(
+                self.limit_per_host)
+        return self._host_semaphores[host]
+
+    async def _read_capped(self, response: aiohttp.ClientResponse) -> bytes:
+        """
+        Streams the response body, aborting once it exceeds max_bytes.
+
+        Args:
+            response (aiohttp.ClientResponse): The response to read.
+
+        Returns:
+            bytes: The body.
+
+        Raises:
+            ResponseTooLarge: If the body is larger than max_bytes.
+        """
+        if (response.content_length or 0) > self.max_bytes:
+            raise ResponseTooLarge(
+                f"Content-Length {response.content_length} exceeds {self.max_bytes} bytes"
+            )
+        chunks = []
+        size = 0
+        async for chunk in response.content.iter_chunked(64 * 1024):
+            size += len(chunk)
+            if size > self.max_bytes:
+                raise ResponseTooLarge(
+                    f"Body exceeds {self.max_bytes} bytes")
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    async def fetch(
+        self, url: str, etag: Optional[str] = None, last_modified: Optional[str] = None
+    ) -> FetchResult:
+        """
+        Fetches a page, retrying transient failures and respecting the domain's circuit breaker.
+
+        Args:
+            url (str): The URL to fetch.
+            etag (str, optional): ETag from a previous fetch of the URL.
+            last_modified (str, optional): Last-Modified from a previous fetch of the URL.
+
+        Returns:
+            FetchResult: The decoded page, or not_modified=True on a 304.
+
+        Raises:
+            CircuitOpenError: If the domain's circuit is open.
+            aiohttp.ClientResponseError: For 4xx/5xx responses, after retries for retryable ones.
+            ResponseTooLarge: If the body is larger than max_bytes.
+            asyncio.TimeoutError: If a timeout is exceeded on every attempt.
+        """
+        domain = urlparse(url).netloc.lower()
+        failed_attempts = 0
+        try:
+            async for attempt in AsyncRetrying(
+                retry=retry_if_exception(is_retryable),
+                wait=wait_exponential_jitter(initial=1, max=self.max_backoff),
+                stop=stop_after_attempt(self.max_attempts),
+                reraise=True,
+            ):
+                # The host slot is held per attempt, not during backoff, and
+                # the breaker is consulted once a slot is free so requests
+                # queued behind a failing host are skipped rather than sent
+                with attempt:
+                    async with self._host_semaphore(url):
+                        probe = self.breaker.state(domain) == CircuitBreaker.HALF_OPEN
+                        if not self.breaker.allow(domain, retry=failed_attempts > 0):
+                            raise CircuitOpenError(
+                                f"Circuit open for {domain}; skipped {url}")
+                        if attempt.retry_state.attempt_number > 1:
+                            self.retries += 1
+                        try:
+                            result = await self._fetch_once(url, etag, last_modified)
+                        except Exception as e:
+                            # Only failures that point at an unhealthy host count
+                            # towards the breaker; a 404 or an oversized page show
+                            # the host is answering
+                            if is_retryable(e):
+                                failed_attempts += 1
+                                self.breaker.record_failure(domain)
+                            else:
+                                self.breaker.record_success(domain)
+                            raise
+                        except BaseException:
+                            # Cancelled: says nothing about the host, but a
+                            # half-open probe must not stay claimed forever
+                            if probe:
+                                self.breaker.release(domain)
+                            raise
+                        self.breaker.record_success(domain)
+                        return result
+        except CircuitOpenError:
+            # Blocked before the first attempt is a skip; blocked on a retry
+            # after real failures is a failed fetch
+            if failed_attempts:
+                self.failures += 1
+            raise
+        except Exception:
+            self.failures += 1
+            raise
+
+    def stats(self) -> Dict[str, object]:
+        """
+        Returns request, retry and circuit breaker counters of the fetcher.
+
+        Returns:
+            Dict[str, object]: Requests sent, retries, failed fetches, fetches skipped by open
+            circuits, and the breaker state per domain.
+        """
+        domains = self.breaker.stats()
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "failures": self.failures,
+            "skipped": sum(state["skipped"] for state in domains.values()),
+            "domains": domains,
+        }
+
+    async def _fetch_once(
+        self, url: str, etag: Optional[str] = None, last_modified: Optional[str] = None
+    ) -> FetchResult:
+        """
+        Sends one request for a page, revalidating with If-None-Match / If-Modified-Since when validators are given.
+
+        Args:
+            url (str): The URL to fetch.
+            etag (str, optional): ETag from a previous fetch of the URL.
+            last_modified (str, optional): Last-Modified from a previous fetch of the URL.
+
+        Returns:
+            FetchResult: The decoded page, or not_modified=True on a 304.
+
+        Raises:
+            aiohttp.ClientResponseError: For 4xx/5xx responses.
+            ResponseTooLarge: If the body is larger than max_bytes.
+            asyncio.TimeoutError: If a timeout is exceeded.
+        """
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+        self.requests += 1
+        async with self.session.get(url, headers=headers) as response:
+            if response.status == 304:
+                return FetchResult(
+                    url=url,
+                    status=304,
+                    etag=etag,
+                    last_modified=last_modified,
+                    not_modified=True,
+                )
+            response.raise_for_status()
+            body = await self._read_capped(response)
+            return FetchResult(
+                url=url,
+                status=response.status,
+                text=_decode(body, response.charset),
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+            )
+
+
+if __name__ == "__main__":
+    # Retry and circuit breaker behaviour against a local fault-injecting server:
+    #   python -m src.ingestion.http_fetcher
+    from aiohttp import web
+
+    calls = {"flaky": 0}
+
+    async def _flaky(request):
+        # Fails twice with 503, then answers
+        calls["flaky"] += 1
+        if calls["flaky"] % 3:
+            return web.Response(status=503)
+        return web.Response(text="<p>recovered</p>", content_type="text/html")
+
+    async def _dead(request):
+        return web.Response(status=502)
+
+    async def _missing(request):
+        return web.Response(status=404)
+
+    async def _run():
+        app = web.Application()
+        app.router.add_get("/flaky", _flaky)
+        app.router.add_get("/dead/{n}", _dead)
+        app.router.add_get("/missing", _missing)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", 8088).start()
+        # 127.0.0.1 and localhost are separate domains for the breaker
+        flaky_base, dead_base = "http://127.0.0.1:8088", "http://localhost:8088"
+
+        breaker = CircuitBreaker(failure_threshold=4, cooldown=1.0)
+        async with ArticleFetcher(max_backoff=0.05, breaker=breaker) as fetcher:
+            result = await fetcher.fetch(f"{flaky_base}/flaky")
+            logger.info(f"flaky: {result.text!r} after {fetcher.retries} retries")
+
+            outcomes = await asyncio.gather(
+                *[fetcher.fetch(f"{dead_base}/dead/{n}") for n in range(20)],
+                return_exceptions=True,
+            )
+            skipped = sum(isinstance(o, CircuitOpenError) for o in outcomes)
+            logger.info(
+                f"dead: {fetcher.requests} requests sent in total, {skipped} of 20 fetches skipped, "
+                f"circuit {breaker.state('localhost:8088')}"
+            )
+
+            await asyncio.sleep(breaker.cooldown)
+            logger.info(f"after cool-down: circuit {breaker.state('localhost:8088')}")
+            try:
+                await fetcher.fetch(f"{dead_base}/missing")
+            except aiohttp.ClientResponseError as e:
+                logger.info(
+                    f"probe answered {e.status}: circuit {breaker.state('localhost:8088')}")
+            logger.info(fetcher.stats())
+        await runner.cleanup()
+
+    asyncio.run(_run())
@@ -1,98 +1,341 @@
+import asyncio
 import json
+import math
 import os
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 
-import requests
+import aiohttp
 from dotenv import load_dotenv
 
-from src.utils.dbconnector import find_one_document, insert_document
+from src.utils.async_dbconnector import (find_documents_async,
+                                         find_one_document_async,
+                                         run_in_db_executor,
+                                         upsert_documents_async)
+from src.utils.dbconnector import get_mongo_client
 from src.utils.logger import setup_logger
 
 # Load API key from .env file
 load_dotenv()
 API_KEY = os.getenv("NEWS_API_KEY")
+NEWSAPI_URL = os.getenv("NEWSAPI_URL", "https://newsapi.org/v2/everything")
+# NewsAPI accepts at most 100 articles per page
+NEWSAPI_PAGE_SIZE = min(int(os.getenv("NEWSAPI_PAGE_SIZE", 100)), 100)
+# Results of a query are reused for this long before NewsAPI is asked for newer articles
+QUERY_REFRESH_TTL = timedelta(
+    minutes=float(os.getenv("QUERY_REFRESH_TTL_MINUTES", 60)))
+
+# Query parameters that only track where a click came from (plus any utm_*)
+TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid", "ref", "cmpid"}
 
 # Configure logger
 logger = setup_logger()
 
 
-def fetch_news(query, from_date: datetime, sort_by, limit, to_json):
+def normalize_url(url):
+    """
+    Normalizes an article URL so that links to the same page compare equal.
+
+    Lowercases the scheme and host, drops "www.", default ports, the fragment,
+    tracking parameters and a trailing slash, and sorts the remaining query parameters.
+
+    Args:
+        url (str): The article URL.
+
+    Returns:
+        str: The normalized URL.
+    """
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (name, value)
+        for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not (name.lower().startswith("utm_") or name.lower() in TRACKING_PARAMS)
+    )
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit(
+        (parts.scheme.lower() or "https", host, path, urlencode(query), ""))
+
+
+def article_id_for_url(url):
+    """
+    Derives a stable article ID from the normalized URL.
+
+    Args:
+        url (str): The article URL.
+
+    Returns:
+        str: A UUID (version 5) string, the same for every link to the same page.
+    """
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, normalize_url(url)))
+
+
+def to_article_document(article):
+    """
+    Converts a NewsAPI article to the document stored in News_Articles.
+
+    Args:
+        article (dict): An entry of the "articles" list of a NewsAPI response.
+
+    Returns:
+        dict: The document, with an ID derived from its URL (random if it has none).
+    """
+    url = article.get("url")
+    return {
+        "id": article_id_for_url(url) if url else str(uuid.uuid4()),
+        "title": article.get("title"),
+        "description": article.get("description"),
+        "url": article.get("url"),
+        "urltoimage": article.get("urlToImage"),
+        "publishedat": article.get("publishedAt"),
+        "source": (article.get("source") or {}).get("name"),
+    }
+
+
+def save_query_watermark(query, new_ids, latest_published_at, refreshed_at):
+    """
+    Appends new article IDs to a query's record in News_Articles_Ids and advances its watermark.
+
+    The record is created on the first fetch of the query. latest_published_at
+    only ever moves forward ($max), so an out-of-order refresh cannot rewind it.
+
+    Args:
+        query (str): The NewsAPI query.
+        new_ids (List[str]): IDs of articles not yet listed for the query.
+        latest_published_at (str, optional): Newest publishedAt among the fetched articles (ISO 8601).
+        refreshed_at (datetime.datetime): When NewsAPI was asked.
+    """
+    update = {
+        "$addToSet": {"ids": {"$each": new_ids}},
+        "$set": {"refreshed_at": refreshed_at},
+    }
+    if latest_published_at:
+        update["$max"] = {"latest_published_at": latest_published_at}
+    get_mongo_client()["News_Articles_Ids"].update_one(
+        {"query": query}, update, upsert=True)
+
+
+async def fetch_news_page(session, query, from_date, sort_by, page, page_size):
+    """
+    Requests one page of results from NewsAPI.
+
+    Args:
+        session (aiohttp.ClientSession): The session to send the request with.
+        query (str): The query to search for in the NewsAPI.
+        from_date (str): The date from which to fetch the articles.
+        sort_by (str): The field to sort the results by.
+        page (int): The 1-based page number.
+        page_size (int): The number of articles per page.
+
+    Returns:
+        dict: The decoded response.
+
+    Raises:
+        aiohttp.ClientResponseError: If NewsAPI answers with an error status.
+    """
+    params = {
+        "q": query,
+        "from": str(from_date),
+        "sortBy": sort_by,
+        "page": page,
+        "pageSize": page_size,
+    }
+    # The key goes in a header so it does not end up in logged URLs
+    async with session.get(
+        NEWSAPI_URL, params=params, headers={"X-Api-Key": API_KEY or ""}
+    ) as response:
+        response.raise_for_status()
+        return await response.json()
+
+
+async def fetch_news_async(
+    query,
+    from_date: datetime,
+    sort_by,
+    limit,
+    to_json,
+    page_size=NEWSAPI_PAGE_SIZE,
+    session=None,
+    refresh_ttl=QUERY_REFRESH_TTL,
+):
     """
     Fetches news articles from NewsAPI for the given query, from date and sort_by.
 
+    The first page tells how many results exist; the remaining pages needed to
+    reach limit are then requested concurrently over the same session. Article
+    IDs are derived from the normalized URL and all articles are written with a
+    single bulk upsert, so an article returned by several queries is stored,
+    scraped and processed once.
+
+    Each query keeps a watermark in News_Articles_Ids: the newest publishedAt
+    seen and the time of the last refresh. Within refresh_ttl of that refresh
+    NewsAPI is not called at all; after it, only articles published since the
+    watermark are requested and their IDs appended to the query's list.
+
     Args:
         query (str): The query to search for in the NewsAPI.
         from_date (datetime.datetime): The date from which to fetch the articles.
         sort_by (str): The field to sort the results by.
         limit (int): The number of articles to fetch.
         to_json (bool): Whether to store the results in a JSON file.
+        page_size (int): The number of articles per request, at most 100.
+        session (aiohttp.ClientSession, optional): Session to reuse. A new one is opened when not given.
+        refresh_ttl (datetime.timedelta): How long a query's results are reused before refreshing.
 
     Returns:
-        List[str]: The IDs of the articles that were fetched and stored in MongoDB.
+        List[str]: The IDs of the articles newly listed for the query (all of them on its first
+        fetch, only the delta on a refresh, none while the results are fresh or if the request
+        failed; a failure is logged and leaves the watermark unchanged). The delta only
+        says what NewsAPI returned; articles still to be processed are found from the
+        query's full list in News_Articles_Ids.
     """
-    url = f"https://newsapi.org/v2/everything?q={query}&from={from_date}&sortBy={sort_by}&apiKey={API_KEY}"
+    if session is None:
+        async with aiohttp.ClientSession() as session:
+            return await fetch_news_async(
+                query, from_date, sort_by, limit, to_json, page_size, session, refresh_ttl
+            )
+
+    page_size = max(1, min(page_size, limit, 100))
     try:
         logger.debug("Requesting data from NewsAPI")
-        previous = find_one_document("News_Articles_Ids", {"query": query})
+        previous = None
+        if not to_json:
+            previous = await find_one_document_async("News_Articles_Ids", {"query": query})
+        known_ids = set(previous["ids"]) if previous else set()
+        watermark = previous.get("latest_published_at") if previous else None
         if previous:
-            logger.info(f"Previous data found for {query} from {from_date}")
-            return previous["ids"]
-        response = requests.get(url)
-        response.raise_for_status()  # Raise an error for bad status codes
-        data = response.json()
-
-        if data.get("status") == "ok":
-            logger.info(f"Total results: {data.get('totalResults')}")
-            if to_json:
-                try:
-                    # store the data in json
-                    # -----
-                    filename = f"{query.replace(' ', '_')}_{from_date}.json"
-                    with open(filename, "w", encoding="utf-8") as f:
-                        json.dump(data, f, ensure_ascii=False, indent=4)
-                    logger.info(f"Results stored in {filename}")
-                    # -----
-                except Exception as e:
-                    logger.error(
-                        f"Error occurred while storing results: {str(e)}")
-            else:
-                articles_db = []
-                article_ids = []
-                for article in data.get("articles", [])[:limit]:
-                    logger.debug(
-                        f"Adding ids to articles and saving them to MongoDB")
-                    id = str(uuid.uuid4())
-                    article_ids.append(id)
-                    article_obj = {
-                        "id": id,
-                        "title": article.get("title"),
-                        "description": article.get("description"),
-                        "url": article.get("url"),
-                        "urltoimage": article.get("urlToImage"),
-                        "publishedat": article.get("publishedAt"),
-                        "source": article.get("source").get("name"),
-                    }
-                    insert_document("News_Articles", article_obj)
-
-                logger.info(f"Total articles saved: {len(articles_db)}")
-                logger.debug(f"Article IDs: {article_ids}")
-                insert_document(
-                    "News_Articles_Ids", {"query": query, "ids": article_ids}
-                )
-                return article_ids
-        else:
+            refreshed_at = previous.get("refreshed_at")
+            if refreshed_at and refreshed_at.tzinfo is None:
+                refreshed_at = refreshed_at.replace(tzinfo=timezone.utc)
+            if refreshed_at and datetime.now(timezone.utc) - refreshed_at < refresh_ttl:
+                logger.info(
+                    f"Results for {query} refreshed at {refreshed_at}; reusing them")
+                return []
+            logger.info(
+                f"Refreshing {query} with articles published since {watermark or from_date}")
+        # ISO 8601 strings order chronologically, so the later bound wins
+        since = max(str(from_date), watermark) if watermark else str(from_date)
+        requested_at = datetime.now(timezone.utc)
+
+        data = await fetch_news_page(session, query, since, sort_by, 1, page_size)
+        if data.get("status") != "ok":
             logger.error(f"Error in response: {data}")
-    except requests.exceptions.RequestException as e:
+            return []
+        logger.info(f"Total results: {data.get('totalResults')}")
+
+        available = min(limit, data.get("totalResults") or 0)
+        pages = await asyncio.gather(
+            *[
+                fetch_news_page(session, query, since,
+                                sort_by, page, page_size)
+                for page in range(2, math.ceil(available / page_size) + 1)
+            ],
+            return_exceptions=True,
+        )
+        articles = list(data.get("articles", []))
+        for page, result in enumerate(pages, start=2):
+            if isinstance(result, Exception) or result.get("status") != "ok":
+                # Later pages can fail (e.g. the plan's result cap); keep what arrived
+                logger.warning(f"Skipping page {page} for {query}: {result}")
+                continue
+            articles.extend(result.get("articles", []))
+
+        # Results can shift between pages while they are being read, and
+        # syndicated copies differ only in tracking parameters
+        seen_urls = set()
+        unique_articles = []
+        for article in articles:
+            url = article.get("url")
+            if url:
+                normalized = normalize_url(url)
+                if normalized in seen_urls:
+                    continue
+                seen_urls.add(normalized)
+            unique_articles.append(article)
+        articles = unique_articles[:limit]
+
+        if to_json:
+            try:
+                # store the data in json
+                # -----
+                filename = f"{query.replace(' ', '_')}_{from_date}.json"
+                data = {**data, "articles": articles}
+                with open(filename, "w", encoding="utf-8") as f:
+                    json.dump(data, f, ensure_ascii=False, indent=4)
+                logger.info(f"Results stored in {filename}")
+                # -----
+            except Exception as e:
+                logger.error(f"Error occurred while storing results: {str(e)}")
+            return None
+
+        logger.debug("Adding ids to articles and saving them to MongoDB")
+        articles_db = [to_article_document(article) for article in articles]
+        # Articles stored before IDs were derived from URLs keep their old ID.
+        # url_unique only covers string URLs, so the filter says so to be able to use it
+        stored = await find_documents_async(
+            "News_Articles",
+            {"url": {"$in": [a["url"] for a in articles_db if a["url"]], "$type": "string"}},
+            {"_id": 0, "id": 1, "url": 1},
+        )
+        stored_ids = {doc["url"]: doc["id"] for doc in stored}
+        for article in articles_db:
+            article["id"] = stored_ids.get(article["url"], article["id"])
+        # NewsAPI's "from" is inclusive, so the watermark article comes back
+        articles_db = [a for a in articles_db if a["id"] not in known_ids]
+        article_ids = [article["id"] for article in articles_db]
+        # Articles already stored by another query are referenced, not duplicated
+        new_count = await upsert_documents_async("News_Articles", articles_db)
+
+        logger.info(
+            f"Total articles saved: {new_count} new, "
+            f"{len(articles_db) - new_count} already stored and reused"
+        )
+        logger.debug(f"Article IDs: {article_ids}")
+        latest = max(
+            (a["publishedat"] for a in articles_db if a["publishedat"]), default=None
+        )
+        await run_in_db_executor(
+            save_query_watermark, query, article_ids, latest, requested_at
+        )
+        return article_ids
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        # The watermark is untouched, so the next call retries the refresh
         logger.error(f"HTTP Request failed: {type(e).__name__} - {str(e)}")
+        return []
+
+
+def fetch_news(query, from_date: datetime, sort_by, limit, to_json, page_size=NEWSAPI_PAGE_SIZE):
+    """
+    Blocking wrapper for fetch_news_async, for callers without an event loop.
+
+    Args:
+        query (str): The query to search for in the NewsAPI.
+        from_date (datetime.datetime): The date from which to fetch the articles.
+        sort_by (str): The field to sort the results by.
+        limit (int): The number of articles to fetch.
+        to_json (bool): Whether to store the results in a JSON file.
+        page_size (int): The number of articles per request, at most 100.
+
+    Returns:
+        List[str]: The IDs of the articles newly listed for the query.
+    """
+    return asyncio.run(
+        fetch_news_async(query, from_date, sort_by, limit, to_json, page_size)
+    )
 
 
 if __name__ == "__main__":
-    # if __name__ == "__main__" and __package__ is None:
-    __package__ = "src.ingestion"
+    # Example usage: saves one query's results to a JSON file
+    #   python -m src.ingestion.newsapi
     fetch_news(
         query="Kolkata Murder case",
         from_date="2024-08-21",
         sort_by="popularity",
+        limit=100,
         to_json=True,
     )
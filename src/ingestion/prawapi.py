@@ -1,11 +1,26 @@
+"""
+Reddit ingestion with PRAW.
+
+Posts matching a keyword are searched once, then their top comments are
+fetched concurrently on a long-lived thread pool. Each worker thread has its
+own praw.Reddit client (PRAW clients are not thread-safe), which it keeps
+across calls along with its OAuth token, comment trees are requested sorted by
+score with bounded ``replace_more`` expansion, and only the top COMMENT_COUNT
+comments are kept with a heap. Posts and comments are bulk-written to the
+``Reddit_Posts`` and ``Reddit_Comments`` collections.
+"""
+import heapq
 import json
 import os
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 import praw
 from dotenv import load_dotenv
 
+from src.utils.dbconnector import BulkUpdater
 from src.utils.logger import setup_logger
 
 sys.path.append(os.path.abspath(os.path.join(
@@ -15,21 +30,85 @@ sys.path.append(os.path.abspath(os.path.join(
 
 load_dotenv()
 
-reddit = praw.Reddit(
-    client_id=os.getenv("REDDIT_CLIENTID"),
-    client_secret=os.getenv("REDDIT_SECRETKEY"),
-    user_agent="{0} by u/{1}".format(
-        os.getenv("REDDIT_APPNAME"), os.getenv("REDDIT_USERNAME")
-    ),
-    username=os.getenv("REDDIT_USERNAME"),
-    password=os.getenv("REDDIT_PASSWORD"),
-)
-
 logger = setup_logger()
 
 # constants
-COMMENT_COUNT = 10
+COMMENT_COUNT = int(os.getenv("REDDIT_COMMENT_COUNT", 10))
 TIME_SLOT = "all"  # Time filter can be 'all', 'day', 'week', 'month', 'year'
+# Comments requested per post; Reddit returns them best-scored first
+COMMENT_FETCH_LIMIT = int(os.getenv("REDDIT_COMMENT_FETCH_LIMIT", 100))
+# "Load more comments" stubs expanded per post, one API call each; 0 drops them
+REPLACE_MORE_LIMIT = int(os.getenv("REDDIT_REPLACE_MORE_LIMIT", 0))
+REDDIT_MAX_WORKERS = int(os.getenv("REDDIT_MAX_WORKERS", 4))
+
+_reddit_local = threading.local()
+_reddit_overrides = {}
+_reddit_generation = 0
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def configure_reddit(**settings):
+    """
+    Overrides praw.Reddit settings for clients created from now on, in every thread.
+
+    Used to point the ingester at another account or at a stub transport
+    (``requestor_kwargs={"session": ...}``).
+
+    Args:
+        **settings: Keyword arguments for praw.Reddit.
+    """
+    global _reddit_overrides, _reddit_generation
+    _reddit_overrides = settings
+    _reddit_generation += 1
+
+
+def get_reddit() -> praw.Reddit:
+    """
+    Returns the calling thread's Reddit client, creating it on first use.
+
+    Credentials are read from the environment when the client is created, not
+    at import time, so importing this module needs no Reddit configuration.
+
+    Returns:
+        praw.Reddit: The client of the current thread.
+    """
+    if getattr(_reddit_local, "generation", None) != _reddit_generation:
+        settings = {
+            "client_id": os.getenv("REDDIT_CLIENTID"),
+            "client_secret": os.getenv("REDDIT_SECRETKEY"),
+            "user_agent": "{0} by u/{1}".format(
+                os.getenv("REDDIT_APPNAME"), os.getenv("REDDIT_USERNAME")
+            ),
+            "username": os.getenv("REDDIT_USERNAME"),
+            "password": os.getenv("REDDIT_PASSWORD"),
+        }
+        settings.update(_reddit_overrides)
+        _reddit_local.reddit = praw.Reddit(**settings)
+        _reddit_local.generation = _reddit_generation
+    return _reddit_local.reddit
+
+
+def get_reddit_executor(max_workers: int = REDDIT_MAX_WORKERS) -> ThreadPoolExecutor:
+    """
+    Returns the thread pool used for Reddit API calls, creating it on first use.
+
+    The pool lives for the whole process, so its threads, and the Reddit
+    client each of them holds, are reused by every fetch instead of being
+    created (and authenticated) again per call.
+
+    Args:
+        max_workers (int): Number of worker threads. One pool is kept per size.
+
+    Returns:
+        concurrent.futures.ThreadPoolExecutor: The shared executor.
+    """
+    with _executors_lock:
+        if max_workers not in _executors:
+            _executors[max_workers] = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="reddit")
+        return _executors[max_workers]
 
 
 def clean_content(content: str) -> str:
@@ -51,21 +130,106 @@ def clean_content(content: str) -> str:
     return cleaned_content
 
 
-def fetch_reddit_posts_by_keyword(keyword, limit=10, to_json=True):
+def post_document(post) -> dict:
+    """
+    Converts a submission to the document stored in Reddit_Posts.
+
+    Args:
+        post (praw.models.Submission): The submission.
+
+    Returns:
+        dict: The post fields.
+    """
+    return {
+        "title": post.title,
+        "id": post.id,
+        "content": clean_content(post.selftext),
+        "url": post.url,
+        "subreddit": str(post.subreddit),
+        "score": post.score,
+        "num_comments": post.num_comments,
+        "created_utc": datetime.utcfromtimestamp(post.created_utc).isoformat(),
+    }
+
+
+def comment_document(comment, post_id: str) -> dict:
+    """
+    Converts a comment to the document stored in Reddit_Comments.
+
+    Args:
+        comment (praw.models.Comment): The comment.
+        post_id (str): ID of the submission the comment belongs to.
+
+    Returns:
+        dict: The comment fields.
+    """
+    return {
+        "id": comment.id,
+        "post_id": post_id,
+        "content": clean_content(comment.body),
+        "score": comment.score,
+        "created_utc": datetime.utcfromtimestamp(comment.created_utc).isoformat(),
+    }
+
+
+def fetch_top_comments(
+    post_id: str,
+    count: int = COMMENT_COUNT,
+    replace_more_limit: int = REPLACE_MORE_LIMIT,
+):
+    """
+    Fetches the highest-scored comments of a submission.
+
+    The comment tree is requested sorted by "top" and capped at
+    COMMENT_FETCH_LIMIT, at most replace_more_limit "load more" stubs are
+    expanded, and the top comments are picked with heapq.nlargest instead of
+    sorting the whole tree.
+
+    Args:
+        post_id (str): ID of the submission.
+        count (int): Number of comments to keep.
+        replace_more_limit (int): Maximum number of "load more" stubs to expand.
+
+    Returns:
+        List[dict]: The comment documents, best-scored first.
+    """
+    submission = get_reddit().submission(id=post_id)
+    submission.comment_sort = "top"
+    submission.comment_limit = COMMENT_FETCH_LIMIT
+    submission.comments.replace_more(limit=replace_more_limit)
+    top_comments = heapq.nlargest(
+        count,
+        (c for c in submission.comments.list() if hasattr(c, "body")),
+        key=lambda c: c.score or 0,
+    )
+    return [comment_document(comment, post_id) for comment in top_comments]
+
+
+def fetch_reddit_posts_by_keyword(
+    keyword,
+    limit=10,
+    to_json=False,
+    comment_count=COMMENT_COUNT,
+    replace_more_limit=REPLACE_MORE_LIMIT,
+    max_workers=REDDIT_MAX_WORKERS,
+):
     """
-    Fetches Reddit posts containing the given keyword.
+    Fetches Reddit posts containing the given keyword with their top comments and stores them in MongoDB.
 
     Args:
         keyword (str): The keyword to search for in Reddit posts.
         limit (int, optional): The number of posts to fetch. Defaults to 10.
-        to_json (bool, optional): Whether to store the results in a JSON file. Defaults to True.
+        to_json (bool, optional): Whether to also store the results in a JSON file. Defaults to False.
+        comment_count (int, optional): Number of top comments kept per post.
+        replace_more_limit (int, optional): Maximum "load more" stubs expanded per post.
+        max_workers (int, optional): Number of posts whose comments are fetched concurrently.
 
     Returns:
         List[Dict]: A list of dictionaries containing the post data.
     """
     try:
         # Search for posts containing the keyword
-        search_results = reddit.subreddit("all").search(
+        search_results = get_reddit().subreddit("all").search(
             query=keyword,
             sort="relevance",  # Sort results by relevance
             time_filter=TIME_SLOT,
@@ -76,49 +240,46 @@ def fetch_reddit_posts_by_keyword(keyword, limit=10, to_json=True):
         for post in search_results:
             if not post or post.stickied:  # Skip if post is None or stickied
                 continue
+            posts.append(post_document(post))
+            logger.debug(f"Post Title: {post.title}")
+            logger.debug(f"Post URL: {post.url}")
 
-            post_data = {
-                "title": post.title,
-                "id": post.id,
-                "content": clean_content(post.selftext),
-                "url": post.url,
-                "created_utc": datetime.utcfromtimestamp(post.created_utc).isoformat(),
-                "top_comments": [],
-            }
-
-            # Fetch and process top comments
+        def _comments(post_id):
             try:
-                comments = post.comments.list()  # Get all comments
-                sorted_comments = sorted(
-                    comments,
-                    key=lambda c: c.score if hasattr(c, "score") else 0,
-                    reverse=True,
-                )
-                top_comments = sorted_comments[:COMMENT_COUNT]
+                return fetch_top_comments(post_id, comment_count, replace_more_limit)
+            except Exception as e:
+                logger.error(
+                    f"Error fetching comments for post ID {post_id}: {str(e)}")
+                return []
+
+        # Comment trees are one or more API round trips each, so fetch them concurrently
+        all_comments = list(get_reddit_executor(max_workers).map(
+            _comments, [p["id"] for p in posts]))
 
+        with BulkUpdater("Reddit_Posts", upsert=True) as post_updater, \
+                BulkUpdater("Reddit_Comments", upsert=True) as comment_updater:
+            for post_data, comments in zip(posts, all_comments):
+                post_updater.update(post_data["id"], {
+                    **post_data,
+                    "keyword": keyword,
+                    "top_comment_ids": [c["id"] for c in comments],
+                })
+                for comment in comments:
+                    comment_updater.update(comment["id"], comment)
                 post_data["top_comments"] = [
                     {
-                        "comment_id": comment.id,
-                        "comment_content": clean_content(comment.body),
-                        "comment_score": comment.score,
-                        "comment_created_utc": datetime.utcfromtimestamp(
-                            comment.created_utc
-                        ).isoformat(),
+                        "comment_id": comment["id"],
+                        "comment_content": comment["content"],
+                        "comment_score": comment["score"],
+                        "comment_created_utc": comment["created_utc"],
                     }
-                    for comment in top_comments
-                    if hasattr(comment, "body")
+                    for comment in comments
                 ]
-            except Exception as e:
-                logger.error(
-                    f"Error fetching comments for post ID {post.id}: {str(e)}")
-
-            posts.append(post_data)
-            logger.debug(f"Post Title: {post.title}")
-            logger.debug(f"Post URL: {post.url}")
-            logger.debug(
-                f"Post Content: {post.selftext[:100]}"
-            )  # Print a snippet of content
 
+        logger.info(
+            f"Fetched {len(posts)} posts and {sum(map(len, all_comments))} comments "
+            f"containing the keyword '{keyword}'"
+        )
         if to_json:
             try:
                 filename = f"{keyword}_posts_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.json"
@@ -127,10 +288,7 @@ def fetch_reddit_posts_by_keyword(keyword, limit=10, to_json=True):
                 logger.info(f"Results stored in {filename}")
             except Exception as e:
                 logger.error(f"Error occurred while storing results: {str(e)}")
-        else:
-            logger.info(
-                f"Fetched {len(posts)} posts containing the keyword '{keyword}'"
-            )
+        return posts
 
     except Exception as e:
         logger.error(f"Error fetching posts: {type(e).__name__} - {str(e)}")
@@ -138,4 +296,5 @@ def fetch_reddit_posts_by_keyword(keyword, limit=10, to_json=True):
 
 if __name__ == "__main__":
     # Example usage: searching for posts about "python"
+    #   python -m src.ingestion.prawapi
     fetch_reddit_posts_by_keyword(keyword="python", limit=10)
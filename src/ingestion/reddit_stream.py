@@ -0,0 +1,381 @@
+"""
+Long-running Reddit ingestion that follows new submissions and comments.
+
+A poller thread asks Reddit for items newer than the last one it saw
+(``before=<fullname>``, one page at a time, oldest first) and hands them to
+the consumer through a bounded queue. When the downstream sink falls behind
+the queue fills up and the poller blocks, so Reddit is not polled faster
+than items can be handled.
+
+The last fullname handled by the sink is checkpointed per stream in the
+``Reddit_Stream_Checkpoints`` collection only after the sink returns, so a
+restart resumes right after it: nothing is skipped and, since the sink
+upserts by ID, nothing is stored twice.
+
+If the anchor item is deleted or removed, Reddit answers every ``before=``
+request with an empty page. After REDDIT_STREAM_RESYNC_POLLS empty polls in a
+row the poller therefore re-reads the newest page without ``before`` and drops
+the items it has already seen, as PRAW's stream_generator does.
+"""
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from dotenv import load_dotenv
+
+from src.ingestion.prawapi import comment_document, get_reddit, post_document
+from src.utils.dbconnector import BulkUpdater, get_mongo_client
+from src.utils.logger import setup_logger
+
+load_dotenv()
+logger = setup_logger()
+
+CHECKPOINT_COLLECTION = "Reddit_Stream_Checkpoints"
+REDDIT_STREAM_QUEUE_SIZE = int(os.getenv("REDDIT_STREAM_QUEUE_SIZE", 500))
+REDDIT_STREAM_POLL_INTERVAL = float(os.getenv("REDDIT_STREAM_POLL_INTERVAL", 10))
+REDDIT_STREAM_BATCH_SIZE = int(os.getenv("REDDIT_STREAM_BATCH_SIZE", 50))
+REDDIT_STREAM_RESYNC_POLLS = int(os.getenv("REDDIT_STREAM_RESYNC_POLLS", 3))
+
+# Listing endpoint per item kind, relative to r/<subreddits>/
+LISTING_PATHS = {"submissions": "new", "comments": "comments"}
+# Reddit returns at most 100 items per listing page
+PAGE_LIMIT = 100
+# Recently seen fullnames kept per listing, a little over three pages like PRAW
+SEEN_LIMIT = 301
+
+
+class BoundedSet:
+    """
+    Set of the most recently added items; the oldest are dropped past max_items.
+    """
+
+    def __init__(self, max_items: int = SEEN_LIMIT):
+        """
+        Args:
+            max_items (int): Number of items kept.
+        """
+        self.max_items = max_items
+        self._items = OrderedDict()
+
+    def __contains__(self, item) -> bool:
+        return item in self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def add(self, item):
+        """
+        Adds an item, evicting the oldest one if the set is full.
+
+        Args:
+            item (Hashable): The item to add.
+        """
+        self._items[item] = None
+        self._items.move_to_end(item)
+        if len(self._items) > self.max_items:
+            self._items.popitem(last=False)
+
+
+def load_checkpoint(stream: str) -> Tuple[Optional[str], Optional[float]]:
+    """
+    Returns the last item the sink handled for a stream.
+
+    Args:
+        stream (str): The stream name.
+
+    Returns:
+        Tuple[Optional[str], Optional[float]]: The item's fullname (e.g. "t3_abc123") and
+        created_utc, or (None, None) if the stream never ran.
+    """
+    doc = get_mongo_client()[CHECKPOINT_COLLECTION].find_one({"_id": stream})
+    if not doc:
+        return None, None
+    return doc["fullname"], doc.get("created_utc")
+
+
+def save_checkpoint(stream: str, fullname: str, created_utc: Optional[float] = None):
+    """
+    Records the last item the sink handled for a stream.
+
+    Args:
+        stream (str): The stream name.
+        fullname (str): The fullname of the item.
+        created_utc (float, optional): The item's creation time, used to resync if it is deleted.
+    """
+    get_mongo_client()[CHECKPOINT_COLLECTION].update_one(
+        {"_id": stream},
+        {"$set": {"fullname": fullname, "created_utc": created_utc,
+                  "updated_at": datetime.now(timezone.utc)}},
+        upsert=True,
+    )
+
+
+def matches_keywords(item, keywords: Sequence[str]) -> bool:
+    """
+    Checks whether a submission or comment mentions any of the keywords.
+
+    Args:
+        item (praw.models.Submission | praw.models.Comment): The item.
+        keywords (Sequence[str]): Lower-case keywords. Empty matches everything.
+
+    Returns:
+        bool: True if the item matches.
+    """
+    if not keywords:
+        return True
+    # vars() rather than getattr: a missing attribute makes PRAW fetch the item again
+    fields = vars(item)
+    text = " ".join(
+        fields.get(field) or "" for field in ("title", "selftext", "body")
+    ).lower()
+    return any(keyword in text for keyword in keywords)
+
+
+def created_utc(item) -> Optional[float]:
+    """
+    Returns an item's creation time without making PRAW fetch it again.
+
+    Args:
+        item (praw.models.Submission | praw.models.Comment): The item.
+
+    Returns:
+        float: Seconds since the epoch, or None if the listing did not include it.
+    """
+    return vars(item).get("created_utc")
+
+
+def store_items(items: List) -> None:
+    """
+    Default sink: upserts submissions into Reddit_Posts and comments into Reddit_Comments.
+
+    Args:
+        items (List): Submissions and comments, oldest first.
+    """
+    with BulkUpdater("Reddit_Posts", upsert=True) as post_updater, \
+            BulkUpdater("Reddit_Comments", upsert=True) as comment_updater:
+        for item in items:
+            if item.fullname.startswith("t3_"):
+                post_updater.update(item.id, post_document(item))
+            else:
+                comment_updater.update(
+                    item.id, comment_document(item, item.link_id[3:]))
+
+
+class RedditStream:
+    """
+    Follows new submissions and/or comments of subreddits, with checkpoints and backpressure.
+
+    Example:
+        stream = RedditStream("india+worldnews", keywords=["kolkata"])
+        stream.run()  # until interrupted
+    """
+
+    def __init__(
+        self,
+        subreddits: str,
+        keywords: Sequence[str] = (),
+        kinds: Sequence[str] = ("submissions", "comments"),
+        sink: Callable[[List], None] = store_items,
+        queue_size: int = REDDIT_STREAM_QUEUE_SIZE,
+        poll_interval: float = REDDIT_STREAM_POLL_INTERVAL,
+        batch_size: int = REDDIT_STREAM_BATCH_SIZE,
+        resync_polls: int = REDDIT_STREAM_RESYNC_POLLS,
+    ):
+        """
+        Args:
+            subreddits (str): Subreddit names joined with "+".
+            keywords (Sequence[str]): Keep only items mentioning one of these (case-insensitive).
+            kinds (Sequence[str]): Which listings to follow: "submissions", "comments" or both.
+            sink (Callable[[List], None]): Called with each batch of matching items, oldest first.
+            queue_size (int): Items buffered between poller and sink before polling blocks.
+            poll_interval (float): Seconds between polls of a listing that had nothing new.
+            batch_size (int): Maximum items handed to the sink at once.
+            resync_polls (int): Empty polls of a listing after which its newest page is
+                re-read without ``before``, in case the anchor item was deleted.
+        """
+        self.subreddits = subreddits
+        self.keywords = [keyword.lower() for keyword in keywords]
+        self.kinds = list(kinds)
+        self.sink = sink
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.resync_polls = resync_polls
+        self.stats = {"polled": 0, "matched": 0, "stored": 0,
+                      "requests": 0, "resyncs": 0, "blocked_seconds": 0.0}
+
+    def stream_name(self, kind: str) -> str:
+        """
+        Returns the checkpoint key of one listing of this stream.
+
+        Args:
+            kind (str): "submissions" or "comments".
+
+        Returns:
+            str: The stream name.
+        """
+        return f"{kind}:{self.subreddits}"
+
+    def fetch_newer(self, kind: str, fullname: Optional[str]) -> List:
+        """
+        Fetches one page of items newer than fullname.
+
+        Args:
+            kind (str): "submissions" or "comments".
+            fullname (str, optional): The newest item already seen. None starts from the newest page.
+
+        Returns:
+            List: Up to 100 items, oldest first.
+        """
+        params = {"limit": PAGE_LIMIT, "raw_json": 1}
+        if fullname:
+            params["before"] = fullname
+        self.stats["requests"] += 1
+        listing = get_reddit().get(
+            f"r/{self.subreddits}/{LISTING_PATHS[kind]}", params=params)
+        # Listings are newest first; timestamps can tie, so reverse rather than sort
+        return list(listing)[::-1]
+
+    def _put(self, entry, stop: threading.Event) -> bool:
+        """
+        Queues an entry, blocking while the queue is full. Returns False if stopped meanwhile.
+        """
+        start = time.monotonic()
+        while not stop.is_set():
+            try:
+                self.queue.put(entry, timeout=0.5)
+                self.stats["blocked_seconds"] += time.monotonic() - start
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _poll(self, stop: threading.Event):
+        """
+        Poller thread: queues (kind, fullname, created_utc, item or None) entries until stopped.
+
+        Non-matching items are queued as None payloads so their position still
+        advances the checkpoint once everything before them has been handled.
+        """
+        cursors, cursor_times = {}, {}
+        for kind in self.kinds:
+            cursors[kind], cursor_times[kind] = load_checkpoint(
+                self.stream_name(kind))
+        seen = {kind: BoundedSet() for kind in self.kinds}
+        empty_polls = {kind: 0 for kind in self.kinds}
+        while not stop.is_set():
+            found_any = False
+            for kind in self.kinds:
+                # An empty page may only mean the anchor item is gone
+                resync = cursors[kind] is not None and empty_polls[kind] >= self.resync_polls
+                try:
+                    page = self.fetch_newer(kind, None if resync else cursors[kind])
+                except Exception as e:
+                    logger.error(f"Failed to poll {self.stream_name(kind)}: {e}")
+                    continue
+                items = [item for item in page if item.fullname not in seen[kind]]
+                if resync:
+                    self.stats["resyncs"] += 1
+                    empty_polls[kind] = 0
+                    # After a restart nothing has been seen yet; the checkpoint time
+                    # keeps older items of the newest page from being handled again
+                    if cursor_times[kind] is not None:
+                        items = [item for item in items
+                                 if (created_utc(item) or 0) >= cursor_times[kind]]
+                    if items:
+                        logger.warning(
+                            f"{self.stream_name(kind)}: nothing after {cursors[kind]}, but "
+                            f"{len(items)} unseen items on the newest page; resyncing")
+                    if page:
+                        cursors[kind] = page[-1].fullname
+                if not items:
+                    empty_polls[kind] += 1
+                    continue
+                empty_polls[kind] = 0
+                for item in items:
+                    seen[kind].add(item.fullname)
+                    self.stats["polled"] += 1
+                    keep = matches_keywords(item, self.keywords)
+                    self.stats["matched"] += keep
+                    entry = (kind, item.fullname, created_utc(item),
+                             item if keep else None)
+                    if not self._put(entry, stop):
+                        return
+                found_any = True
+                cursors[kind] = items[-1].fullname
+                cursor_times[kind] = created_utc(items[-1])
+            if not found_any:
+                stop.wait(self.poll_interval)
+
+    def _drain(self, timeout: float) -> List:
+        """
+        Takes up to batch_size queued entries, waiting at most timeout for the first.
+        """
+        try:
+            batch = [self.queue.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def run(self, stop: Optional[threading.Event] = None, max_items: Optional[int] = None) -> Dict[str, float]:
+        """
+        Streams until stop is set or max_items matching items have been stored.
+
+        Args:
+            stop (threading.Event, optional): Set from another thread to end the stream.
+            max_items (int, optional): Stop after storing this many matching items.
+
+        Returns:
+            Dict[str, float]: Items polled, matched and stored, Reddit requests made, and
+            seconds the poller spent blocked on a full queue.
+        """
+        stop = stop or threading.Event()
+        poller = threading.Thread(
+            target=self._poll, args=(stop,), name="reddit-stream", daemon=True)
+        poller.start()
+        try:
+            while not stop.is_set():
+                batch = self._drain(timeout=0.5)
+                if not batch:
+                    if not poller.is_alive():
+                        logger.error("Reddit stream poller exited; stopping.")
+                        break
+                    continue
+                items = [item for _, _, _, item in batch if item is not None]
+                if items:
+                    self.sink(items)
+                # Checkpoint only what the sink has handled
+                last_seen = {}
+                for kind, fullname, created, _ in batch:
+                    last_seen[kind] = (fullname, created)
+                for kind, (fullname, created) in last_seen.items():
+                    save_checkpoint(self.stream_name(kind), fullname, created)
+                self.stats["stored"] += len(items)
+                if max_items is not None and self.stats["stored"] >= max_items:
+                    break
+        finally:
+            stop.set()
+            poller.join()
+        logger.info(f"Reddit stream {self.subreddits} stopped: {self.stats}")
+        return self.stats
+
+
+if __name__ == "__main__":
+    # Follow subreddits for keywords until interrupted:
+    #   python -m src.ingestion.reddit_stream india+worldnews kolkata
+    import sys
+
+    stream = RedditStream(sys.argv[1], keywords=sys.argv[2:])
+    try:
+        stream.run()
+    except KeyboardInterrupt:
+        pass
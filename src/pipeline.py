@@ -1,125 +1,234 @@
 import asyncio
-import json
-from concurrent.futures import ThreadPoolExecutor
 
-from aiohttp import ClientSession
-from tenacity import retry, stop_after_attempt, wait_fixed
-
-from src.ingestion.fetch_articles import fetch_article_content
-from src.ingestion.newsapi import fetch_news
-from src.preprocessing.keyword_extraction import (bert_keyword_extraction,
-                                                  extract_keywords)
+from src.ingestion.fetch_articles import (fetch_article_content,
+                                          stale_content_ids_async)
+from src.ingestion.http_fetcher import ArticleFetcher
+from src.ingestion.newsapi import fetch_news_async
+from src.preprocessing.deduplication import cluster_near_duplicates, dedup_text
+from src.preprocessing.keyword_extraction import extract_keywords
 from src.preprocessing.summarization import summarize_texts
-from src.sentiment_analysis.classify import (analyze_sentiments,
-                                             classify_sentiments)
-from src.sentiment_analysis.wordcloud import generate_wordcloud
-from src.utils.dbconnector import append_to_document, content_manager
+from src.sentiment_analysis.classify import analyze_sentiments
+from src.utils.async_dbconnector import (AsyncBulkUpdater,
+                                         content_manager_async,
+                                         content_status_many_async,
+                                         find_documents_async,
+                                         find_one_document_async,
+                                         run_in_db_executor)
+from src.utils.dbconnector import ensure_indexes
 from src.utils.logger import setup_logger
+from src.utils.micro_batch import MicroBatcher
+from src.utils.model_pool import get_model_pool
+from src.utils.stage_dag import Stage, StageDAG
 
 # Setup logger
 logger = setup_logger()
 
+# Fields written by the pipeline stages, in the order they are produced
+PIPELINE_FIELDS = ["content", "summary", "keywords", "sentiment"]
+
+# Fields produced by the model stages, copied from an article to its near-duplicates
+STAGE_RESULT_FIELDS = ["summary", "keywords", "sentiment", "sentiment_score"]
+
+# Largest number of articles a stage processes in one batched call
+STAGE_BATCH_SIZE = 16
+
+# Articles each stage works on at once; model stages need a full batch in flight
+STAGE_CONCURRENCY = {
+    "content": 16,
+    "summary": STAGE_BATCH_SIZE,
+    "keywords": STAGE_BATCH_SIZE,
+    "sentiment": STAGE_BATCH_SIZE,
+}
+
+# Articles that may wait for a stage before the stages feeding it block
+STAGE_QUEUE_SIZE = 4 * STAGE_BATCH_SIZE
+
+
+# Concurrent per-article calls to a stage are grouped into one batched call.
+# The KeyBERT and sentiment batches run in the model pool when MODEL_POOL_WORKERS
+# is set (see process_articles_async), otherwise in the default thread pool.
+summary_batcher = MicroBatcher(summarize_texts, max_batch_size=STAGE_BATCH_SIZE)
+keyword_batcher = MicroBatcher(extract_keywords, max_batch_size=STAGE_BATCH_SIZE)
+sentiment_batcher = MicroBatcher(
+    analyze_sentiments, max_batch_size=STAGE_BATCH_SIZE)
+
 
 async def summarize_texts_async(article_id):
     """
     Asynchronous wrapper for summarize_texts.
 
+    Concurrent calls are micro-batched into a single summarize_texts call.
+
     Args:
         article_id (str): ID of the article to summarize.
 
     Returns:
-        str: Summarized text.
+        Dict[str, str]: The ID and summary of the article, or None if it was not summarized.
     """
-    loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(None, summarize_texts, [article_id])
+    return await summary_batcher.submit(article_id)
 
 
 async def extract_keywords_async(article_id):
     """
     Asynchronous wrapper for extract_keywords.
 
+    Concurrent calls are micro-batched into a single extract_keywords call.
+
     Args:
         article_id (str): ID of the article to extract keywords from.
 
     Returns:
-        List[str]: List of extracted keywords.
+        Dict[str, List[str]]: The ID and keywords of the article, or None on failure.
     """
-    loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(None, extract_keywords, [article_id])
+    return await keyword_batcher.submit(article_id)
 
 
 async def analyze_sentiments_async(article_id):
     """
     Asynchronous wrapper for analyze_sentiments.
 
+    Concurrent calls are micro-batched into a single analyze_sentiments call.
+
     Args:
         article_id (str): ID of the article to analyze.
 
     Returns:
-        List[Dict[str, float]]: List of sentiment analysis results for each text.
+        Dict[str, float]: The ID, sentiment label and score of the article, or None on failure.
     """
-    loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(None, analyze_sentiments, [article_id])
+    return await sentiment_batcher.submit(article_id)
 
 
-async def process_single_article_async(article_id, session):
-    # Check the presence of content, summary, keywords, and sentiment in the DB
+async def fetch_content_stage_async(article_id, fetcher):
+    """
+    Fetches the content of one article for the stage DAG.
+
+    Args:
+        article_id (str): ID of the article.
+        fetcher (ArticleFetcher): The open fetcher to use for page requests.
+
+    Returns:
+        bool: True if the content was fetched and stored.
+    """
+    return bool(await fetch_article_content([article_id], fetcher))
+
+
+def build_article_dag(fetcher):
+    """
+    Builds the DAG of per-article stages.
+
+    Keywords are extracted from the summary and sentiment is computed from the
+    content, so once the content is there the summary and sentiment stages run
+    side by side, and keywords follow the summary.
+
+    Args:
+        fetcher (ArticleFetcher): The open fetcher used by the content stage.
+
+    Returns:
+        StageDAG: The stage DAG.
+    """
+    return StageDAG([
+        Stage(
+            "content",
+            lambda article_id: fetch_content_stage_async(article_id, fetcher),
+            concurrency=STAGE_CONCURRENCY["content"],
+            queue_size=STAGE_QUEUE_SIZE,
+        ),
+        Stage(
+            "summary",
+            summarize_texts_async,
+            inputs=["content"],
+            concurrency=STAGE_CONCURRENCY["summary"],
+            queue_size=STAGE_QUEUE_SIZE,
+        ),
+        Stage(
+            "keywords",
+            extract_keywords_async,
+            inputs=["summary"],
+            concurrency=STAGE_CONCURRENCY["keywords"],
+            queue_size=STAGE_QUEUE_SIZE,
+        ),
+        Stage(
+            "sentiment",
+            analyze_sentiments_async,
+            inputs=["content"],
+            concurrency=STAGE_CONCURRENCY["sentiment"],
+            queue_size=STAGE_QUEUE_SIZE,
+        ),
+    ])
+
+
+async def process_single_article_async(article_id, fetcher, field_status=None):
     """
     Process a single article asynchronously, by fetching content, summarizing, extracting keywords and analyzing sentiment.
 
+    Stages that do not depend on each other run concurrently (see build_article_dag).
+
     Args:
         article_id (str): ID of the article to process.
-        session (aiohttp.ClientSession): The aiohttp session to use for the request.
+        fetcher (ArticleFetcher): The open fetcher to use for page requests.
+        field_status (Dict[str, bool], optional): Presence of content, summary, keywords and
+            sentiment for the article, as returned by content_status_many. Looked up when not given.
 
     Returns:
         str: The ID of the article that was processed.
     """
-    field_status = content_manager(
-        article_id, ["content", "summary", "keywords", "sentiment"]
+    # Check the presence of content, summary, keywords, and sentiment in the DB
+    if field_status is None:
+        field_status = await content_manager_async(article_id, PIPELINE_FIELDS)
+
+    await build_article_dag(fetcher).run([article_id], {article_id: field_status})
+    return article_id
+
+
+async def group_near_duplicates_async(article_ids):
+    """
+    Groups articles whose title and description are near-identical.
+
+    Args:
+        article_ids (List[str]): IDs of the articles to group, most important first.
+
+    Returns:
+        Dict[str, List[str]]: The duplicates of each representative article ID.
+    """
+    docs = await find_documents_async(
+        "News_Articles", {"id": {"$in": article_ids}}, {
+            "_id": 0, "id": 1, "title": 1, "description": 1}
     )
+    text_by_id = {doc["id"]: dedup_text(doc) for doc in docs}
+    texts = {article_id: text_by_id.get(article_id, "")
+             for article_id in article_ids}
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, cluster_near_duplicates, texts)
 
-    # Fetch content only if not already present
-    if not field_status["content"]:
-        content = await fetch_article_content([article_id], session)
-        # Save content to MongoDB
-        # append_to_document("News_Articles", {"id": article_id}, {"content": content})
-    else:
-        logger.info(
-            f"Content already exists for article {article_id}. Skipping fetch.")
-
-    # Summarize only if summary is not already present
-    if not field_status["summary"]:
-        if not field_status["content"]:
-            content = await fetch_article_content([article_id], session)
-        summary = await summarize_texts_async(article_id)
-        # Save summary to MongoDB
-        # append_to_document("News_Articles", {"id": article_id}, {"summary": summary})
-    else:
-        logger.info(
-            f"Summary already exists for article {article_id}. Skipping summarization."
-        )
-
-    # Extract keywords only if not already present
-    if not field_status["keywords"]:
-        keywords = await extract_keywords_async(article_id)
-        # Save keywords to MongoDB
-        # append_to_document("News_Articles", {"id": article_id}, {"keywords": keywords})
-    else:
-        logger.info(
-            f"Keywords already exist for article {article_id}. Skipping extraction."
-        )
-
-    # Analyze sentiment only if not already present
-    if not field_status["sentiment"]:
-        sentiment = await analyze_sentiments_async(article_id)
-        # Save sentiment to MongoDB
-        # append_to_document("News_Articles", {"id": article_id}, {"sentiment": sentiment})
-    else:
-        logger.info(
-            f"Sentiment already exists for article {article_id}. Skipping sentiment analysis."
-        )
 
-    return article_id
+async def copy_stage_results_async(groups):
+    """
+    Copies the summary, keywords and sentiment of each representative to its near-duplicates.
+
+    Args:
+        groups (Dict[str, List[str]]): The duplicates of each representative article ID.
+    """
+    representatives = [
+        article_id for article_id, duplicates in groups.items() if duplicates]
+    if not representatives:
+        return
+
+    docs = await find_documents_async(
+        "News_Articles",
+        {"id": {"$in": representatives}},
+        {"_id": 0, "id": 1, **{field: 1 for field in STAGE_RESULT_FIELDS}},
+    )
+    async with AsyncBulkUpdater("News_Articles") as updater:
+        for doc in docs:
+            results = {field: doc[field]
+                       for field in STAGE_RESULT_FIELDS if field in doc}
+            for duplicate_id in groups[doc["id"]]:
+                await updater.update(
+                    duplicate_id, {**results, "duplicate_of": doc["id"]}
+                )
+    logger.info(
+        f"Copied results to {sum(len(d) for d in groups.values())} near-duplicate articles."
+    )
 
 
 async def process_articles_async(query, limit=10):
@@ -130,29 +239,97 @@ async def process_articles_async(query, limit=10):
         query (str): The query to search for in the NewsAPI.
         limit (int, optional): The number of articles to fetch. Defaults to 10.
 
+    The watermark of fetch_news_async only limits the NewsAPI request. Every
+    article listed for the query that is still missing a stage goes through
+    the stages, so articles left incomplete by an earlier run (failed fetches,
+    hosts skipped by an open circuit, failed summaries) are retried.
+
     Returns:
-        List[str]: The IDs of the articles that were processed.
+        List[str]: The IDs of all articles listed for the query.
     """
     logger.info("Starting the processing of articles.")
-    article_ids = fetch_news(
+    await run_in_db_executor(ensure_indexes)
+    # Only article IDs cross into the model pool; its workers start on first use
+    model_pool = get_model_pool()
+    keyword_batcher.executor = sentiment_batcher.executor = model_pool
+    new_ids = await fetch_news_async(
         query=query,
         from_date="2024-08-16",
         sort_by="popularity",
         limit=limit,
         to_json=False,
     )
-    if not isinstance(article_ids, list):
+    if not isinstance(new_ids, list):
         raise ValueError("article_ids should be a list")
+    logger.info(f"{len(new_ids)} articles newly listed for {query}.")
+    listed_ids = await query_article_ids_async(query)
+    article_ids = list(dict.fromkeys(new_ids + listed_ids))
+    if not article_ids:
+        logger.info(f"No articles listed for {query}; nothing to process.")
+        return []
+
+    # Look up which stages are already done for the whole batch at once
+    field_status = await content_status_many_async(article_ids, PIPELINE_FIELDS)
+    processed = sum(
+        all(field_status[article_id][field] for field in PIPELINE_FIELDS)
+        for article_id in article_ids
+    )
+    logger.info(
+        f"{processed} of {len(article_ids)} articles already processed; "
+        f"skipping them entirely."
+    )
 
-    async with ClientSession() as session:
-        tasks = [
-            process_single_article_async(article_id, session)
+    async with ArticleFetcher() as fetcher:
+        # Content is fetched up front so that articles whose stored content
+        # is older than CONTENT_REFRESH_TTL and has changed are pending again
+        missing_content = [
+            article_id
             for article_id in article_ids
+            if not field_status[article_id]["content"]
         ]
-        await asyncio.gather(*tasks)
+        stale_content = await stale_content_ids_async(article_ids)
+        if missing_content or stale_content:
+            await fetch_article_content(
+                missing_content + stale_content, fetcher, refresh=True)
+            field_status = await content_status_many_async(
+                article_ids, PIPELINE_FIELDS)
+
+        pending = [
+            article_id
+            for article_id in article_ids
+            if not all(field_status[article_id][field] for field in PIPELINE_FIELDS)
+        ]
+        groups = await group_near_duplicates_async(pending) if pending else {}
+
+        # Only one representative per group of near-duplicates is processed
+        await build_article_dag(fetcher).run(list(groups), field_status)
+
+        open_circuits = [
+            domain
+            for domain, state in fetcher.stats()["domains"].items()
+            if state["state"] != "closed"
+        ]
+        if open_circuits:
+            logger.warning(f"Publishers skipped by open circuits: {open_circuits}")
+
+    await copy_stage_results_async(groups)
 
     logger.info("Processing completed.")
-    return article_ids
+    return await query_article_ids_async(query)
+
+
+async def query_article_ids_async(query):
+    """
+    Returns the IDs of all articles listed for a query in News_Articles_Ids.
+
+    Args:
+        query (str): The NewsAPI query.
+
+    Returns:
+        List[str]: The article IDs, empty if the query was never fetched.
+    """
+    record = await find_one_document_async("News_Articles_Ids", {"query": query})
+    return record["ids"] if record else []
 
 
 def process_articles(query, limit=10):
@@ -164,48 +341,11 @@ def process_articles(query, limit=10):
         limit (int, optional): The number of articles to fetch. Defaults to 10.
 
     Returns:
-        List[str]: The IDs of the articles that were processed.
+        List[str]: The IDs of all articles listed for the query.
     """
     logger.info("Starting the processing of articles.")
     article_ids = asyncio.run(process_articles_async(query, limit))
     return article_ids
-    # Fetch articles from NewsAPI
-    article_ids = fetch_news(
-        query=query,
-        from_date="2024-08-04",
-        sort_by="popularity",
-        limit=limit,
-        to_json=False,
-    )
-    if not isinstance(article_ids, list):
-        raise ValueError("article_ids should be a list")
-
-    # Get contents for each article
-    article_contents = fetch_article_content(article_ids)
-
-    # contents_file = f"{query.replace(' ', '_')}_contents2.json"
-    # with open(contents_file, "w", encoding="utf-8") as f:
-    #     json.dump(article_contents, f, ensure_ascii=False, indent=4)
-
-    # Summarize the articles
-    logger.info("Summarizing articles.")
-    article_summaries = summarize_texts(article_ids)
-
-    # summaries_file = f"{query.replace(' ', '_')}_summaries2.json"
-    # with open(summaries_file, "w", encoding="utf-8") as f:
-    #     json.dump(article_summaries, f, ensure_ascii=False, indent=4)
-
-    # Extract keywords from summaries
-    logger.info("Extracting keywords from summaries.")
-    article_keywords = extract_keywords(article_ids, top_n=10)
-
-    # keywords_file = f"{query.replace(' ', '_')}_keywords2.json"
-    # with open(keywords_file, "w", encoding="utf-8") as f:
-    #     json.dump(article_keywords, f, ensure_ascii=False, indent=4)
-
-    # Analyze sentiments of summaries
-    logger.info("Analyzing sentiments of summaries.")
-    article_sentiments = analyze_sentiments(article_ids)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,196 @@
+"""
+Near-duplicate detection for fetched articles with MinHash and LSH banding.
+
+News searches return many near-identical rewrites of the same wire story.
+Grouping them before the model stages lets the pipeline summarize, extract
+keywords from and classify one representative per group and copy its results
+to the rest.
+
+Articles are compared by title and description (see dedup_text). These come
+from NewsAPI for every article, whereas fetched content can be mostly page
+boilerplate: in the saved Kolkata results, grouping on content at 0.8
+marks 12 of 100 articles as duplicates, mostly unrelated Times of India
+stories whose content is the same sidebar text, while title and description
+at 0.5 mark 2, the two stories the site published under two URLs each.
+"""
+import os
+import zlib
+from typing import Dict, List
+
+import numpy as np
+from dotenv import load_dotenv
+
+from src.utils.logger import setup_logger
+
+load_dotenv()
+
+logger = setup_logger()
+
+# Minimum estimated Jaccard similarity of title + description shingles to group two articles
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", 0.5))
+
+# Mersenne prime 2^31 - 1: a * x + b stays below 2^62 and fits in uint64
+_MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+
+
+def dedup_text(article: dict) -> str:
+    """
+    Returns the text an article is compared by for near-duplicate detection.
+
+    Args:
+        article (dict): A News_Articles document or NewsAPI article.
+
+    Returns:
+        str: The title and description, empty if the article has neither.
+    """
+    return " ".join(filter(None, [article.get("title"), article.get("description")]))
+
+
+def shingle_hashes(text: str, k: int = 5) -> np.ndarray:
+    """
+    Hashes the word k-shingles of a text.
+
+    Args:
+        text (str): The text to shingle.
+        k (int): Number of words per shingle.
+
+    Returns:
+        np.ndarray: The distinct shingle hashes as uint64, empty for an empty text.
+    """
+    words = text.lower().split()
+    if len(words) < k:
+        shingles = [" ".join(words)] if words else []
+    else:
+        shingles = [" ".join(words[i: i + k])
+                    for i in range(len(words) - k + 1)]
+    return np.unique(
+        np.fromiter(
+            (zlib.crc32(s.encode("utf-8")) for s in shingles),
+            dtype=np.uint64,
+            count=len(shingles),
+        )
+    )
+
+
+def minhash_signatures(texts: List[str], num_perm: int = 128, k: int = 5, seed: int = 1) -> np.ndarray:
+    """
+    Computes MinHash signatures for several texts.
+
+    Args:
+        texts (List[str]): The texts to sign.
+        num_perm (int): Number of hash permutations (signature length).
+        k (int): Number of words per shingle.
+        seed (int): Seed for the permutation coefficients, so signatures are reproducible.
+
+    Returns:
+        np.ndarray: A (len(texts), num_perm) uint64 array. Rows of empty texts are all max values.
+    """
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, int(_MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+    b = rng.integers(0, int(_MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+
+    signatures = np.full((len(texts), num_perm),
+                         np.iinfo(np.uint64).max, dtype=np.uint64)
+    for row, text in enumerate(texts):
+        hashes = shingle_hashes(text, k) % _MERSENNE_PRIME
+        if hashes.size:
+            permuted = (np.outer(a, hashes) + b[:, None]) % _MERSENNE_PRIME
+            signatures[row] = permuted.min(axis=1)
+    return signatures
+
+
+def lsh_clusters(signatures: np.ndarray, bands: int = 32, threshold: float = 0.8) -> List[List[int]]:
+    """
+    Groups rows whose signatures agree on a whole band, then confirms each pair by estimated Jaccard similarity.
+
+    Args:
+        signatures (np.ndarray): MinHash signatures, one row per text.
+        bands (int): Number of LSH bands; must divide the signature length.
+        threshold (float): Minimum estimated Jaccard similarity to link two rows.
+
+    Returns:
+        List[List[int]]: Row indices per cluster, each sorted ascending; singletons included.
+    """
+    n, num_perm = signatures.shape
+    if num_perm % bands:
+        raise ValueError("bands must divide the signature length")
+    rows_per_band = num_perm // bands
+    parent = list(range(n))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    empty = (signatures == np.iinfo(np.uint64).max).all(axis=1)
+    for band in range(bands):
+        buckets = {}
+        chunk = signatures[:, band *
+                           rows_per_band: (band + 1) * rows_per_band]
+        for i in range(n):
+            if empty[i]:
+                continue
+            buckets.setdefault(chunk[i].tobytes(), []).append(i)
+        for members in buckets.values():
+            first = members[0]
+            for other in members[1:]:
+                root_a, root_b = find(first), find(other)
+                if root_a == root_b:
+                    continue
+                similarity = np.mean(signatures[first] == signatures[other])
+                if similarity >= threshold:
+                    parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    clusters = {}
+    for i in range(n):
+        clusters.setdefault(find(i), []).append(i)
+    return list(clusters.values())
+
+
+def cluster_near_duplicates(
+    texts: Dict[str, str], threshold: float = DEDUP_THRESHOLD, num_perm: int = 128, bands: int = 32
+) -> Dict[str, List[str]]:
+    """
+    Groups near-duplicate texts and picks one representative per group.
+
+    The representative is the first ID of the group in the order of texts, so
+    callers control which article is kept (e.g. by passing the most popular first).
+    Empty texts are never grouped.
+
+    Args:
+        texts (Dict[str, str]): Text per article ID.
+        threshold (float): Minimum estimated Jaccard similarity of shingles to group two texts.
+        num_perm (int): MinHash signature length.
+        bands (int): Number of LSH bands.
+
+    Returns:
+        Dict[str, List[str]]: The duplicates of each representative ID (empty for unique texts).
+    """
+    ids = list(texts)
+    signatures = minhash_signatures([texts[i] or "" for i in ids], num_perm)
+    groups = {}
+    for cluster in lsh_clusters(signatures, bands, threshold):
+        representative, *duplicates = [ids[i] for i in sorted(cluster)]
+        groups[representative] = duplicates
+
+    duplicate_count = len(ids) - len(groups)
+    logger.info(
+        f"Near-duplicate detection: {len(ids)} articles in {len(groups)} groups, "
+        f"{duplicate_count} duplicates skip the model stages."
+    )
+    return groups
+
+
+if __name__ == "__main__":
+    import json
+
+    # Duplicate groups in the saved NewsAPI results for the Kolkata case
+    path = os.path.join(os.path.dirname(__file__), "..",
+                        "..", "Kolkata_Murder_case_2024-08-21.json")
+    with open(path, encoding="utf-8") as f:
+        articles = json.load(f)["articles"]
+    texts = {article["url"]: dedup_text(article) for article in articles}
+    for representative, duplicates in cluster_near_duplicates(texts).items():
+        if duplicates:
+            logger.info(f"{representative}: {duplicates}")
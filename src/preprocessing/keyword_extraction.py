@@ -2,12 +2,15 @@ from collections import defaultdict
 from typing import List
 
 import nltk
+import numpy as np
 from keybert import KeyBERT
 from nltk.corpus import stopwords
 from nltk.tokenize import word_tokenize
 
-from src.utils.dbconnector import append_to_document, find_documents
+from src.utils.dbconnector import BulkUpdater, find_documents
+from src.utils.embedding_store import content_hash, get_embedding_store
 from src.utils.logger import setup_logger
+from src.utils.model_registry import get_model, register_model
 
 nltk.download("punkt")
 nltk.download("stopwords")
@@ -15,6 +18,9 @@ nltk.download("stopwords")
 # Setup logger
 logger = setup_logger()
 
+KEYBERT_MODEL_NAME = "all-MiniLM-L6-v2"
+register_model("keybert", lambda: KeyBERT(KEYBERT_MODEL_NAME))
+
 
 # Not in use
 def preprocess_text(text):
@@ -55,7 +61,7 @@ def bert_keyword_extraction(texts: List[str], top_n: int = 10) -> List[str]:
         List[str]: List of unique extracted keywords.
     """
     logger.info("Starting keyword extraction using KeyBERT.")
-    model = KeyBERT("all-MiniLM-L6-v2")
+    model = get_model("keybert")
 
     all_keywords = []
     for text in texts:
@@ -68,6 +74,47 @@ def bert_keyword_extraction(texts: List[str], top_n: int = 10) -> List[str]:
     return list(set(all_keywords))  # Return unique keywords
 
 
+def document_embeddings(model, article_summaries):
+    """
+    Returns the document embedding of each summary, computing only those not in the embedding store.
+
+    Missing embeddings are computed in one batch with KeyBERT's own embedding
+    model and saved to the store for later runs and other consumers.
+
+    Args:
+        model (KeyBERT): The KeyBERT model.
+        article_summaries (List[Dict[str, str]]): Dictionaries with the "id" and "summary" of each article.
+
+    Returns:
+        Dict[str, np.ndarray]: The float32 embedding per article ID. Articles whose
+            embedding could not be computed are left out; KeyBERT embeds them itself.
+    """
+    store = get_embedding_store()
+    keys = {
+        obj["id"]: (obj["id"], content_hash(obj.get("summary")))
+        for obj in article_summaries
+    }
+    found = store.get_many(list(keys.values()))
+    embeddings = {article_id: found[key]
+                  for article_id, key in keys.items() if key in found}
+
+    missing = [obj for obj in article_summaries if obj["id"] not in embeddings]
+    if missing:
+        try:
+            vectors = model.model.embed(
+                [obj.get("summary") or "" for obj in missing])
+            store.put_many(
+                {keys[obj["id"]]: vector for obj, vector in zip(missing, vectors)})
+            for obj, vector in zip(missing, vectors):
+                embeddings[obj["id"]] = np.asarray(vector, dtype=np.float32)
+        except Exception as e:
+            logger.error(f"Failed to compute document embeddings: {e}")
+    logger.info(
+        f"Document embeddings: {len(article_summaries) - len(missing)} reused, {len(missing)} computed."
+    )
+    return embeddings
+
+
 def extract_keywords(article_ids, top_n: int = 10):
     """
     Extracts keywords from a list of texts using KeyBERT.
@@ -85,32 +132,37 @@ def extract_keywords(article_ids, top_n: int = 10):
     for doc in documents:
         article_summaries.append({"id": doc["id"], "summary": doc["summary"]})
 
-    logger.info("Initializing KeyBERT model for keyword extraction.")
-    model = KeyBERT("all-MiniLM-L6-v2")
+    logger.info("Getting KeyBERT model for keyword extraction.")
+    model = get_model("keybert")
+    embeddings = document_embeddings(model, article_summaries)
 
     article_keywords = []
     logger.info(f"Extracting keywords from {len(article_summaries)} texts.")
-    for idx, obj in enumerate(article_summaries):
-        logger.debug(
-            f"Extracting keywords from text {idx+1}/{len(article_summaries)}.")
-        try:
-            keywords = model.extract_keywords(
-                obj.get("summary"),
-                keyphrase_ngram_range=(1, 2),
-                stop_words="english",
-                top_n=top_n,
-            )
-            extracted_keywords = [kw[0] for kw in keywords]
-            keyword_obj = {"id": obj.get("id"), "keywords": extracted_keywords}
-
-            article_keywords.append(keyword_obj)
-            append_to_document("News_Articles", {
-                               "id": obj.get("id")}, keyword_obj)
-            logger.debug(f"Keywords for text {idx+1}: {extracted_keywords}")
-        except Exception as e:
-            logger.error(f"Error extracting keywords from text {idx+1}: {e}")
-            article_keywords.append([])
+    with BulkUpdater("News_Articles") as updater:
+        for idx, obj in enumerate(article_summaries):
+            logger.debug(
+                f"Extracting keywords from text {idx+1}/{len(article_summaries)}.")
+            try:
+                embedding = embeddings.get(obj.get("id"))
+                keywords = model.extract_keywords(
+                    obj.get("summary"),
+                    keyphrase_ngram_range=(1, 2),
+                    stop_words="english",
+                    top_n=top_n,
+                    doc_embeddings=None if embedding is None else embedding[None, :],
+                )
+                extracted_keywords = [kw[0] for kw in keywords]
+                keyword_obj = {"id": obj.get("id"), "keywords": extracted_keywords}
+
+                article_keywords.append(keyword_obj)
+                updater.update(obj.get("id"), keyword_obj)
+                logger.debug(f"Keywords for text {idx+1}: {extracted_keywords}")
+            except Exception as e:
+                logger.error(f"Error extracting keywords from text {idx+1}: {e}")
+                article_keywords.append([])
+
     logger.info("Keyword extraction completed.")
+    logger.debug(f"Embedding store: {get_embedding_store().stats()}")
 
     # --------
     # MongoDB code to store article keywords
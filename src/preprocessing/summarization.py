@@ -1,35 +1,70 @@
+import asyncio
 import os
+import threading
 from typing import List
 
 import google.generativeai as genai
 from dotenv import load_dotenv
-from google.generativeai.types import HarmBlockThreshold, HarmCategory
 
-from src.utils.dbconnector import append_to_document, find_documents
+from src.preprocessing.summarization_engine import (SummarizationEngine,
+                                                    get_backend)
+from src.preprocessing.summary_cache import (lookup_summaries,
+                                             store_summaries,
+                                             summary_cache_key)
+from src.utils.dbconnector import BulkUpdater, find_documents
 from src.utils.logger import setup_logger
 
 load_dotenv()
 
-genai.configure(api_key=os.environ["GEMINI_API_KEY"])
+genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
 
 
 # Setup logger
 logger = setup_logger()
 
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_summarization_engine() -> SummarizationEngine:
+    """
+    Returns the process-wide summarization engine, creating it on first use.
+
+    The backend and limits are read from the environment:
+        SUMMARIZER_BACKEND: "gemini" (default) or "fake"
+        SUMMARIZER_CONCURRENCY: requests in flight (default 8)
+        SUMMARIZER_RPM: requests per minute (default 15)
+        SUMMARIZER_TPM: input tokens per minute (default 1000000)
+
+    Returns:
+        SummarizationEngine: The shared engine, reusing one model object.
+    """
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = SummarizationEngine(
+                get_backend(),
+                concurrency=int(os.getenv("SUMMARIZER_CONCURRENCY", 8)),
+                requests_per_minute=float(os.getenv("SUMMARIZER_RPM", 15)),
+                tokens_per_minute=float(
+                    os.getenv("SUMMARIZER_TPM", 1_000_000)),
+            )
+    return _engine
+
 
 def summarize_texts(
     articles_id: List[str], max_length: int = 200, min_length: int = 20
 ):
     """
-    Summarizes a list of texts using a pre-trained Transformer model.
+    Summarizes a list of articles concurrently with the summarization engine.
 
     Args:
-        texts (List[str]): List of texts to summarize.
+        articles_id (List[str]): List of IDs of the articles to summarize.
         max_length (int): Maximum length of the summary.
         min_length (int): Minimum length of the summary.
 
     Returns:
-        List[str]: List of summarized texts.
+        List[Dict[str, str]]: The ID and summary of each article; "" for articles that failed.
     """
     texts = []
     logger.info("Initializing summarization pipeline.")
@@ -39,40 +74,50 @@ def summarize_texts(
             {"id": article["id"], "content": article.get("content", "")})
     article_summaries = []
 
-    logger.info(f"Starting summarization of {len(texts)} texts.")
-    for idx, obj in enumerate(texts):
-        logger.debug(f"Summarizing text {idx+1}/{len(texts)}.")
-        try:
-            model = genai.GenerativeModel("gemini-1.5-flash")
-            prompt = f"""
-            Summarize the provided news document while preserving the most important keywords and maintaining the original sentiment or tone. Ensure that the summary is concise, accurately reflects the key points, and retains the emotional impact or intent of the original content.
-
-            News Article:
-            {obj.get("content")}
-            """
-            response = model.generate_content(
-                prompt,
-                safety_settings={
-                    HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
-                    HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
-                    HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
-                    HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
-                },
-            )
-            logger.debug(f"DEBUG SUmmary{response.text}")
-            article_summaries.append(
-                {"id": obj.get("id"), "summary": response.text})
-            append_to_document(
-                "News_Articles", {"id": obj.get("id")}, {
-                    "summary": response.text}
-            )
-            logger.debug(f"Summary {idx+1}: {response.text}")
-
-        except Exception as e:
-            logger.error(f"Error summarizing text {idx+1}: {e}")
-            article_summaries.append("")
-            append_to_document("News_Articles", {
-                               "id": obj.get("id")}, {"summary": ""})
+    engine = get_summarization_engine()
+    model_name = engine.backend.model_name
+    contents = [obj.get("content") or "" for obj in texts]
+    keys = [summary_cache_key(content, model_name) for content in contents]
+
+    # Identical text (e.g. syndicated wire stories) is only summarized once
+    cached = lookup_summaries([key for key, content in zip(
+        keys, contents) if content.strip()])
+    to_summarize = {}
+    for key, content in zip(keys, contents):
+        if key not in cached:
+            to_summarize.setdefault(key, content)
+    lookups = len(cached) + len(to_summarize)
+    logger.info(
+        f"Summary cache: {len(cached)}/{lookups} unique texts hit "
+        f"({100 * len(cached) / lookups if lookups else 0:.0f}%)."
+    )
+
+    logger.info(f"Starting summarization of {len(to_summarize)} texts.")
+    # Runs on a worker thread (see pipeline.summarize_texts_async), so it
+    # drives its own event loop for the concurrent requests
+    results = asyncio.run(engine.summarize_many(list(to_summarize.values())))
+    computed = dict(zip(to_summarize, results))
+    store_summaries(
+        {
+            key: summary
+            for key, summary in computed.items()
+            if not isinstance(summary, Exception) and to_summarize[key].strip()
+        },
+        model_name,
+    )
+
+    summaries = [cached.get(key, computed.get(key)) for key in keys]
+    with BulkUpdater("News_Articles") as updater:
+        for idx, (obj, summary) in enumerate(zip(texts, summaries)):
+            if isinstance(summary, Exception):
+                logger.error(f"Error summarizing text {idx+1}: {summary}")
+                article_summaries.append("")
+                updater.update(obj.get("id"), {"summary": ""})
+                continue
+
+            article_summaries.append({"id": obj.get("id"), "summary": summary})
+            updater.update(obj.get("id"), {"summary": summary})
+            logger.debug(f"Summary {idx+1}: {summary}")
 
     logger.info("Summarization completed.")
     return article_summaries
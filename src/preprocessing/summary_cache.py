@@ -0,0 +1,122 @@
+"""
+Content-addressed cache of article summaries.
+
+Syndicated stories appear under several URLs and sources with the same text.
+Summaries are stored in the ``Summary_Cache`` collection under the sha256 of
+the normalized article text plus the prompt and model, so identical text is
+summarized once no matter which article it came from. Entries expire by age
+through a TTL index on ``last_used_at`` (see INDEXES in dbconnector).
+"""
+import hashlib
+from datetime import datetime, timezone
+from typing import Dict, List
+
+from pymongo import UpdateOne
+
+from src.preprocessing.summarization_engine import SUMMARY_PROMPT
+from src.utils.dbconnector import get_mongo_client
+from src.utils.logger import setup_logger
+
+logger = setup_logger()
+
+SUMMARY_CACHE_COLLECTION = "Summary_Cache"
+
+# Changing the prompt changes every key, so stale summaries are never served
+PROMPT_VERSION = hashlib.sha256(SUMMARY_PROMPT.encode("utf-8")).hexdigest()[:12]
+
+
+def normalize_content(content: str) -> str:
+    """
+    Normalizes article text so that copies differing only in whitespace share a key.
+
+    Args:
+        content (str): The article text.
+
+    Returns:
+        str: The text with runs of whitespace collapsed to single spaces.
+    """
+    return " ".join(content.split())
+
+
+def summary_cache_key(content: str, model_name: str) -> str:
+    """
+    Builds the cache key for an article text.
+
+    Args:
+        content (str): The article text.
+        model_name (str): The model that produces the summary.
+
+    Returns:
+        str: Hex sha256 of the prompt version, model name and normalized text.
+    """
+    payload = f"{PROMPT_VERSION}\n{model_name}\n{normalize_content(content)}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def lookup_summaries(keys: List[str]) -> Dict[str, str]:
+    """
+    Fetches the cached summaries for several keys in one query.
+
+    Entries that are found have their ``last_used_at`` refreshed, so frequently
+    reused summaries are not expired.
+
+    Args:
+        keys (List[str]): Cache keys from summary_cache_key.
+
+    Returns:
+        Dict[str, str]: The cached summary for each key that was found.
+    """
+    if not keys:
+        return {}
+    collection = get_mongo_client()[SUMMARY_CACHE_COLLECTION]
+    try:
+        found = {
+            doc["_id"]: doc["summary"]
+            for doc in collection.find(
+                {"_id": {"$in": list(set(keys))}}, {"summary": 1}
+            )
+        }
+        if found:
+            collection.update_many(
+                {"_id": {"$in": list(found)}},
+                {"$set": {"last_used_at": datetime.now(timezone.utc)}},
+            )
+        return found
+    except Exception as e:
+        logger.error(f"Failed to read the summary cache: {e}")
+        return {}
+
+
+def store_summaries(summaries: Dict[str, str], model_name: str):
+    """
+    Stores summaries in the cache with one unordered bulk upsert.
+
+    Args:
+        summaries (Dict[str, str]): Summary per cache key.
+        model_name (str): The model that produced the summaries.
+    """
+    if not summaries:
+        return
+    now = datetime.now(timezone.utc)
+    operations = [
+        UpdateOne(
+            {"_id": key},
+            {
+                "$set": {"summary": summary, "last_used_at": now},
+                "$setOnInsert": {
+                    "created_at": now,
+                    "model": model_name,
+                    "prompt_version": PROMPT_VERSION,
+                },
+            },
+            upsert=True,
+        )
+        for key, summary in summaries.items()
+    ]
+    try:
+        get_mongo_client()[SUMMARY_CACHE_COLLECTION].bulk_write(
+            operations, ordered=False
+        )
+    except Exception as e:
+        # The cache is an optimisation; a failed write only costs a future miss
+        logger.error(f"Failed to write the summary cache: {e}")
@@ -1,20 +1,220 @@
-from typing import Dict, List
+import os
+import time
+from typing import Dict, List, Union
 
-from transformers import pipeline
+import torch
+from transformers import (AutoModelForSequenceClassification, AutoTokenizer,
+                          pipeline)
 
-from src.utils.dbconnector import append_to_document, find_documents
+from src.utils.dbconnector import BulkUpdater, find_documents
 from src.utils.logger import setup_logger
+from src.utils.model_registry import get_model, register_model
 
 # Setup logger
 logger = setup_logger()
 
+SENTIMENT_MODEL_NAME = "cardiffnlp/twitter-roberta-base-sentiment-latest"
+SENTIMENT_BATCH_SIZE = int(os.getenv("SENTIMENT_BATCH_SIZE", 32))
+# "truncate" (first 511 characters) or "chunked" (full text in token windows)
+SENTIMENT_MODE = os.getenv("SENTIMENT_MODE", "truncate")
+# Inference backend: "torch" (fp32), "int8" (torch dynamic quantization) or "onnx"
+SENTIMENT_BACKEND = os.getenv("SENTIMENT_BACKEND", "torch")
 
-def analyze_sentiments(article_ids: List[str]) -> List[Dict[str, float]]:
+
+def load_sentiment_pipeline(backend: str = SENTIMENT_BACKEND):
+    """
+    Builds the sentiment analysis pipeline on the selected CPU inference backend.
+
+    Args:
+        backend (str): "torch" for the fp32 PyTorch model, "int8" for a copy with
+            dynamically quantized Linear layers, or "onnx" for an ONNX Runtime export
+            (requires the optional ``optimum[onnxruntime]`` package).
+
+    Returns:
+        transformers.Pipeline: The sentiment analysis pipeline.
+
+    Raises:
+        ValueError: If the backend is unknown.
+        ImportError: If the onnx backend is selected but optimum is not installed.
+    """
+    if backend == "torch":
+        return pipeline("sentiment-analysis", model=SENTIMENT_MODEL_NAME)
+
+    tokenizer = AutoTokenizer.from_pretrained(SENTIMENT_MODEL_NAME)
+    if backend == "int8":
+        model = AutoModelForSequenceClassification.from_pretrained(
+            SENTIMENT_MODEL_NAME)
+        model = torch.quantization.quantize_dynamic(
+            model.eval(), {torch.nn.Linear}, dtype=torch.qint8
+        )
+    elif backend == "onnx":
+        try:
+            from optimum.onnxruntime import ORTModelForSequenceClassification
+        except ImportError as e:
+            raise ImportError(
+                "The onnx sentiment backend needs optimum: pip install optimum[onnxruntime]"
+            ) from e
+        model = ORTModelForSequenceClassification.from_pretrained(
+            SENTIMENT_MODEL_NAME, export=True
+        )
+    else:
+        raise ValueError(f"Unknown sentiment backend: {backend}")
+    return pipeline("sentiment-analysis", model=model, tokenizer=tokenizer)
+
+
+register_model("sentiment", load_sentiment_pipeline)
+
+
+def batched_inference(
+    analyzer, texts: List[str], batch_size: int = SENTIMENT_BATCH_SIZE
+) -> List[Union[List[Dict[str, float]], Exception]]:
+    """
+    Runs the sentiment pipeline over texts in padded batches.
+
+    Texts are sorted by length before batching so each batch pads to a similar
+    length, and results are returned in the original order. If a batch fails,
+    its texts are retried one by one so a single bad input only fails itself.
+
+    Args:
+        analyzer (transformers.Pipeline): The sentiment analysis pipeline.
+        texts (List[str]): Texts to analyze.
+        batch_size (int): Number of texts per forward pass.
+
+    Returns:
+        List[Union[List[Dict[str, float]], Exception]]: For each text, the pipeline output
+            wrapped in a list (as a single-text call returns it) or the exception it raised.
+    """
+    results = [None] * len(texts)
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i] or ""))
+
+    for start in range(0, len(order), batch_size):
+        batch = order[start: start + batch_size]
+        try:
+            outputs = analyzer([texts[i] for i in batch],
+                               batch_size=batch_size)
+            for i, output in zip(batch, outputs):
+                results[i] = [output]
+        except Exception as e:
+            logger.warning(
+                f"Sentiment batch failed ({e}), retrying its texts one by one.")
+            for i in batch:
+                try:
+                    results[i] = analyzer(texts[i])
+                except Exception as item_error:
+                    results[i] = item_error
+    return results
+
+
+def chunked_inference(
+    analyzer,
+    texts: List[str],
+    batch_size: int = SENTIMENT_BATCH_SIZE,
+    window: int = 510,
+    stride: int = 128,
+) -> List[Union[List[Dict[str, float]], Exception]]:
+    """
+    Scores full texts by running overlapping token windows through the model in one batched stream.
+
+    Each text is tokenized once and split into windows of ``window`` tokens
+    that overlap by ``stride`` tokens. Windows from all texts are sorted by
+    length and run in padded batches, and the class probabilities of each
+    text's windows are averaged, weighted by window length. If a batch fails,
+    its windows are retried one by one so only the texts whose own windows
+    fail are marked as failed.
+
+    Args:
+        analyzer (transformers.Pipeline): The sentiment analysis pipeline.
+        texts (List[str]): Texts to analyze, of any length.
+        batch_size (int): Number of windows per forward pass.
+        window (int): Tokens per window, excluding special tokens.
+        stride (int): Tokens shared by consecutive windows.
+
+    Returns:
+        List[Union[List[Dict[str, float]], Exception]]: For each text, a one-element list with
+            the aggregated label and score, or the exception that prevented scoring it.
+    """
+    tokenizer, model = analyzer.tokenizer, analyzer.model
+    results = [None] * len(texts)
+
+    windows = []  # (text index, token ids)
+    step = window - stride
+    for i, text in enumerate(texts):
+        try:
+            ids = tokenizer(text or "", add_special_tokens=False,
+                            verbose=False)["input_ids"]
+        except Exception as e:
+            results[i] = e
+            continue
+        for start in range(0, max(len(ids) - stride, 1), step):
+            windows.append((i, ids[start: start + window]))
+
+    num_labels = model.config.num_labels
+    totals = torch.zeros(len(texts), num_labels)
+    weights = torch.zeros(len(texts))
+    windows.sort(key=lambda item: len(item[1]))
+    if hasattr(model, "eval"):  # ONNX Runtime models have no train/eval mode
+        model.eval()
+
+    def window_probs(batch):
+        inputs = tokenizer.pad(
+            {
+                "input_ids": [
+                    tokenizer.build_inputs_with_special_tokens(ids) for _, ids in batch
+                ]
+            },
+            return_tensors="pt",
+        ).to(model.device)
+        with torch.no_grad():
+            return torch.softmax(model(**inputs).logits, dim=-1).cpu()
+
+    def accumulate(batch, probs):
+        owners = torch.tensor([i for i, _ in batch])
+        lengths = torch.tensor([max(len(ids), 1)
+                               for _, ids in batch], dtype=torch.float)
+        totals.index_add_(0, owners, probs * lengths[:, None])
+        weights.index_add_(0, owners, lengths)
+
+    for start in range(0, len(windows), batch_size):
+        batch = windows[start: start + batch_size]
+        try:
+            accumulate(batch, window_probs(batch))
+        except Exception as e:
+            logger.warning(
+                f"Sentiment window batch failed ({e}), retrying its windows one by one.")
+            # Only the text whose window actually fails is marked as failed
+            for item in batch:
+                if results[item[0]] is not None:
+                    continue
+                try:
+                    accumulate([item], window_probs([item]))
+                except Exception as item_error:
+                    results[item[0]] = item_error
+
+    for i in range(len(texts)):
+        if results[i] is not None:
+            continue
+        probs = totals[i] / weights[i]
+        label_id = int(probs.argmax())
+        results[i] = [
+            {"label": model.config.id2label[label_id],
+                "score": float(probs[label_id])}
+        ]
+    return results
+
+
+def analyze_sentiments(
+    article_ids: List[str],
+    batch_size: int = SENTIMENT_BATCH_SIZE,
+    mode: str = SENTIMENT_MODE,
+) -> List[Dict[str, float]]:
     """
     Analyze the sentiment of a list of article IDs.
 
     Args:
         article_ids (List[str]): List of article IDs to analyze.
+        batch_size (int): Number of texts per forward pass. Defaults to SENTIMENT_BATCH_SIZE.
+        mode (str): "truncate" scores the first 511 characters of each article, "chunked"
+            scores the full text in overlapping token windows. Defaults to SENTIMENT_MODE.
 
     Returns:
         List[Dict[str, float]]: List of sentiment analysis results for each text.
@@ -30,43 +230,132 @@ def analyze_sentiments(article_ids: List[str]) -> List[Dict[str, float]]:
             }
         )
 
-    logger.info("Initializing sentiment analysis pipeline.")
-    sentiment_analyzer = pipeline(
-        "sentiment-analysis", model="cardiffnlp/twitter-roberta-base-sentiment-latest"
-    )
+    logger.info("Getting sentiment analysis pipeline.")
+    sentiment_analyzer = get_model("sentiment")
 
     article_sentiments = []
-    logger.info(f"Analyzing sentiments for {len(article_obj)} texts.")
-    for idx, obj in enumerate(article_obj):
-        logger.debug(
-            f"Analyzing sentiment for text {idx+1}/{len(article_obj)}.")
-        try:
-            analysis = sentiment_analyzer(obj.get("description")[:511])
-            print("Analysis", analysis)
+    logger.info(
+        f"Analyzing sentiments for {len(article_obj)} texts in batches of {batch_size}."
+    )
+    if mode == "chunked":
+        analyses = chunked_inference(
+            sentiment_analyzer,
+            [obj.get("description") or "" for obj in article_obj],
+            batch_size,
+        )
+    else:
+        analyses = batched_inference(
+            sentiment_analyzer,
+            [(obj.get("description") or "")[:511] for obj in article_obj],
+            batch_size,
+        )
+    with BulkUpdater("News_Articles") as updater:
+        for idx, (obj, analysis) in enumerate(zip(article_obj, analyses)):
+            if isinstance(analysis, Exception):
+                logger.error(
+                    f"Error analyzing sentiment for text {idx+1}: {analysis}")
+                article_sentiments.append({"label": "UNKNOWN", "score": 0.0})
+                updater.update(
+                    obj.get("id"), {"sentiment": "UNKNOWN", "sentiment_score": 0.0}
+                )
+                continue
+
             sentiment_obj = {
                 "id": obj.get("id"),
                 "sentiment": analysis[0]["label"],
                 "sentiment_score": analysis[0]["score"],
             }
             article_sentiments.append(sentiment_obj)
-            append_to_document("News_Articles", {
-                               "id": obj.get("id")}, sentiment_obj)
+            updater.update(obj.get("id"), sentiment_obj)
             logger.debug(f"Sentiment for text {idx+1}: {sentiment_obj}")
 
-        except Exception as e:
-            logger.error(f"Error analyzing sentiment for text {idx+1}: {e}")
-            article_sentiments.append({"label": "UNKNOWN", "score": 0.0})
-            append_to_document(
-                "News_Articles",
-                {"id": obj.get("id")},
-                {"sentiment": "UNKNOWN", "sentiment_score": 0.0},
-            )
-
     logger.info("Sentiment analysis completed.")
     return article_sentiments
 
 
+def compare_backends(
+    texts: List[str], backends: List[str] = ("int8", "onnx"), batch_size: int = SENTIMENT_BATCH_SIZE
+) -> Dict[str, Dict[str, float]]:
+    """
+    Measures accuracy drift and speed of inference backends against the fp32 torch model.
+
+    Args:
+        texts (List[str]): A fixed sample of texts to score.
+        backends (List[str]): The backends to compare with "torch".
+        batch_size (int): Number of texts per forward pass.
+
+    Returns:
+        Dict[str, Dict[str, float]]: Per backend, the share of labels that agree with fp32,
+            the largest score difference on agreeing labels, and texts per second.
+    """
+    report = {}
+    reference = None
+    for backend in ["torch", *backends]:
+        try:
+            analyzer = load_sentiment_pipeline(backend)
+        except ImportError as e:
+            logger.warning(f"Skipping {backend} backend: {e}")
+            continue
+        analyzer(texts[:batch_size], batch_size=batch_size)  # warm-up
+        start = time.perf_counter()
+        outputs = [
+            result[0] if not isinstance(result, Exception) else None
+            for result in batched_inference(analyzer, texts, batch_size)
+        ]
+        throughput = len(texts) / (time.perf_counter() - start)
+        if reference is None:
+            reference = outputs
+        pairs = [(ref, out) for ref, out in zip(
+            reference, outputs) if ref and out]
+        agreeing = [(ref, out)
+                    for ref, out in pairs if ref["label"] == out["label"]]
+        report[backend] = {
+            "label_agreement": len(agreeing) / len(pairs) if pairs else 0.0,
+            "max_score_diff": max(
+                (abs(ref["score"] - out["score"]) for ref, out in agreeing), default=0.0
+            ),
+            "texts_per_second": throughput,
+        }
+        logger.info(f"Sentiment backend {backend}: {report[backend]}")
+    return report
+
+
 if __name__ == "__main__":
-    # Test the function
+    # Throughput of the sentiment pipeline at different batch sizes
     text = "A female trainee doctor was found dead in a seminar hall at a Kolkata hospital, sparking outrage and protests demanding safety for medical professionals. The incident, believed to be rape and murder, highlights the alarming security risks faced by doctors and nurses, particularly women, in India's government hospitals.  Lack of designated rest rooms, unrestricted access to wards, and a lack of background checks for volunteers contribute to the vulnerability. Despite calls for stricter federal laws and increased security measures, many doctors remain pessimistic, feeling resigned to working in unsafe conditions.  The article highlights the pervasive issue of violence against healthcare workers in India, with doctors often facing threats and assaults from patients, their relatives, and even hospital staff."
-    analyze_sentiments([{"id": 1, "summary": text}])
+    analyzer = get_model("sentiment")
+    texts = [text[: 100 + (i * 37) % 411] for i in range(128)]
+    for batch_size in (1, 8, 32):
+        start = time.perf_counter()
+        batched_inference(analyzer, texts, batch_size)
+        elapsed = time.perf_counter() - start
+        logger.info(
+            f"Batch size {batch_size}: {len(texts) / elapsed:.1f} texts/s")
+
+    # Full-text scoring: one batched stream of windows against one call per window
+    article = " ".join([text] * 20)
+    articles = [article] * 8
+    start = time.perf_counter()
+    chunked_inference(analyzer, articles)
+    logger.info(
+        f"Chunked, batched: {time.perf_counter() - start:.2f} s for {len(articles)} articles")
+    tokenizer = analyzer.tokenizer
+    start = time.perf_counter()
+    for body in articles:
+        ids = tokenizer(body, add_special_tokens=False)["input_ids"]
+        for offset in range(0, max(len(ids) - 128, 1), 382):
+            analyzer(tokenizer.decode(ids[offset: offset + 510]))
+    logger.info(
+        f"Per-chunk calls: {time.perf_counter() - start:.2f} s for {len(articles)} articles")
+
+    # Accuracy drift and speed of the CPU backends on the saved Kolkata articles
+    import json
+
+    path = os.path.join(os.path.dirname(__file__), "..",
+                        "..", "Kolkata_Murder_case_2024-08-21.json")
+    with open(path, encoding="utf-8") as f:
+        sample = [
+            f"{article.get('title') or ''}. {article.get('description') or ''}"
+            for article in json.load(f)["articles"]
+        ]
+    compare_backends(sample)
@@ -0,0 +1,248 @@
+"""
+Asynchronous counterparts of the helpers in src.utils.dbconnector.
+
+pymongo calls block, so each operation runs on a small dedicated thread pool
+and the coroutine awaits the result. This keeps a slow MongoDB round trip from
+stalling every other coroutine on the event loop (e.g. in-flight HTTP fetches).
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from src.utils.dbconnector import (BulkUpdater, append_to_document,
+                                   content_manager, content_status_many,
+                                   find_documents, find_one_document,
+                                   insert_document, insert_documents,
+                                   upsert_documents)
+from src.utils.logger import setup_logger
+
+logger = setup_logger()
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _reset_executor_after_fork():
+    """
+    Drops the inherited executor in a forked child, whose worker threads do not survive the fork.
+    """
+    global _executor, _executor_lock
+    _executor = None
+    _executor_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_executor_after_fork)
+
+
+def get_db_executor():
+    """
+    Returns the thread pool used for MongoDB calls, creating it on first use.
+
+    The number of threads is read from MONGO_EXECUTOR_WORKERS (default 16). It
+    should not exceed MONGO_MAX_POOL_SIZE, otherwise threads wait on the
+    connection pool instead of the server.
+
+    Returns:
+        concurrent.futures.ThreadPoolExecutor: the shared executor
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=int(os.getenv("MONGO_EXECUTOR_WORKERS", 16)),
+                    thread_name_prefix="mongo",
+                )
+    return _executor
+
+
+async def run_in_db_executor(func, *args, **kwargs):
+    """
+    Runs a blocking database function on the MongoDB executor and awaits its result.
+
+    Args:
+        func (Callable): The blocking function to run.
+        *args: Positional arguments for func.
+        **kwargs: Keyword arguments for func.
+
+    Returns:
+        Any: The return value of func.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_db_executor(), partial(func, *args, **kwargs)
+    )
+
+
+async def content_manager_async(article_id, required_fields):
+    """
+    Asynchronous wrapper for content_manager.
+
+    Args:
+        article_id (str): The ID of the article to check.
+        required_fields (list): A list of fields to check for presence.
+
+    Returns:
+        dict: A dictionary with the status of each field (True if present, False if not).
+    """
+    return await run_in_db_executor(content_manager, article_id, required_fields)
+
+
+async def content_status_many_async(article_ids, required_fields):
+    """
+    Asynchronous wrapper for content_status_many.
+
+    Args:
+        article_ids (List[str]): IDs of the articles to check.
+        required_fields (list): A list of fields to check for presence.
+
+    Returns:
+        dict: Maps each article ID to a dictionary with the status of each field.
+    """
+    return await run_in_db_executor(content_status_many, article_ids, required_fields)
+
+
+async def insert_document_async(collection_name, document):
+    """
+    Asynchronous wrapper for insert_document.
+
+    Args:
+        collection_name (str): The name of the collection.
+        document (dict): The document to be inserted.
+
+    Returns:
+        str: The ID of the inserted document.
+    """
+    return await run_in_db_executor(insert_document, collection_name, document)
+
+
+async def insert_documents_async(collection_name, documents):
+    """
+    Asynchronous wrapper for insert_documents.
+
+    Args:
+        collection_name (str): The name of the collection.
+        documents (List[dict]): The documents to be inserted.
+
+    Returns:
+        List[ObjectId]: The IDs of the inserted documents.
+    """
+    return await run_in_db_executor(insert_documents, collection_name, documents)
+
+
+async def upsert_documents_async(collection_name, documents, key="id"):
+    """
+    Asynchronous wrapper for upsert_documents.
+
+    Args:
+        collection_name (str): The name of the collection.
+        documents (List[dict]): The documents to be upserted.
+        key (str): The field identifying a document.
+
+    Returns:
+        int: The number of documents that were newly inserted.
+    """
+    return await run_in_db_executor(upsert_documents, collection_name, documents, key)
+
+
+async def find_one_document_async(collection_name, query):
+    """
+    Asynchronous wrapper for find_one_document.
+
+    Args:
+        collection_name (str): The name of the collection.
+        query (dict): The query to select documents.
+
+    Returns:
+        dict: The selected document.
+    """
+    return await run_in_db_executor(find_one_document, collection_name, query)
+
+
+async def append_to_document_async(collection_name, query, update_data):
+    """
+    Asynchronous wrapper for append_to_document.
+
+    Args:
+        collection_name (str): The name of the MongoDB collection.
+        query (dict): The query to select the document to update.
+        update_data (dict): The new data to be appended to the document.
+
+    Returns:
+        int: The number of documents updated.
+    """
+    return await run_in_db_executor(
+        append_to_document, collection_name, query, update_data
+    )
+
+
+async def find_documents_async(collection_name, query, projection=None):
+    """
+    Asynchronous wrapper for find_documents.
+
+    The cursor is consumed on the executor as well, since iterating it issues
+    further blocking getMore calls.
+
+    Args:
+        collection_name (str): The name of the MongoDB collection.
+        query (dict): The query to select documents.
+        projection (dict, optional): The fields to return. Defaults to all fields.
+
+    Returns:
+        list: A list of documents found by the query.
+    """
+    def _find():
+        return list(find_documents(collection_name, query, projection))
+
+    return await run_in_db_executor(_find)
+
+
+class AsyncBulkUpdater:
+    """
+    Asynchronous front end for BulkUpdater.
+
+    Buffering and flushing happen on the MongoDB executor, so a threshold
+    flush never blocks the event loop.
+
+    Example:
+        async with AsyncBulkUpdater("News_Articles") as updater:
+            await updater.update(article_id, {"content": content})
+    """
+
+    def __init__(self, *args, **kwargs):
+        """
+        Args:
+            *args: Positional arguments for BulkUpdater.
+            **kwargs: Keyword arguments for BulkUpdater.
+        """
+        self._updater = BulkUpdater(*args, **kwargs)
+
+    async def update(self, key_value, update_data):
+        """
+        Queues a ``$set`` of update_data on the document whose key equals key_value.
+
+        Args:
+            key_value: Value of the key field for the document to update.
+            update_data (dict): The fields to set.
+        """
+        await run_in_db_executor(self._updater.update, key_value, update_data)
+
+    async def flush(self):
+        """
+        Writes all buffered updates in one unordered bulk_write.
+
+        Returns:
+            int: The number of documents modified by this flush.
+        """
+        return await run_in_db_executor(self._updater.flush)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.flush()
+        return False
+
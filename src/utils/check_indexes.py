@@ -0,0 +1,124 @@
+"""
+Checks that every query shape issued against MongoDB is served by an index.
+
+Runs ``explain`` on each entry of QUERY_SHAPES and reports the ones whose
+winning plan contains a COLLSCAN stage. Run as a script to use it as a check:
+
+    python -m src.utils.check_indexes
+
+The exit status is 1 if any query shape would scan a whole collection.
+"""
+import sys
+from datetime import datetime, timezone
+
+from src.utils.dbconnector import ensure_indexes, get_mongo_client
+from src.utils.logger import setup_logger
+
+logger = setup_logger()
+
+SAMPLE_ID = "00000000-0000-0000-0000-000000000000"
+SAMPLE_DATE = datetime(2024, 8, 21, tzinfo=timezone.utc)
+SAMPLE_REDDIT_ID = "1abcde"
+
+# (collection, kind, query or pipeline) for each lookup the code performs
+QUERY_SHAPES = [
+    ("News_Articles", "find", {"id": SAMPLE_ID}),
+    ("News_Articles", "find", {"id": {"$in": [SAMPLE_ID]}}),
+    # fetch_news_async: articles already stored under another ID (url_unique is partial)
+    (
+        "News_Articles",
+        "find",
+        {"url": {"$in": ["https://example.com/article"], "$type": "string"}},
+    ),
+    # stale_content_ids_async: stored content due for revalidation
+    (
+        "News_Articles",
+        "find",
+        {
+            "id": {"$in": [SAMPLE_ID]},
+            "content": {"$nin": [None, ""]},
+            "$or": [
+                {"fetched_at": {"$lt": SAMPLE_DATE}},
+                {"fetched_at": {"$exists": False}},
+            ],
+        },
+    ),
+    (
+        "News_Articles",
+        "aggregate",
+        [{"$match": {"id": {"$in": [SAMPLE_ID]}}}, {"$project": {"_id": 0, "id": 1}}],
+    ),
+    ("News_Articles_Ids", "find", {"query": "sample query"}),
+    # BulkUpdater upserts from prawapi and reddit_stream
+    ("Reddit_Posts", "find", {"id": SAMPLE_REDDIT_ID}),
+    ("Reddit_Comments", "find", {"id": SAMPLE_REDDIT_ID}),
+    ("Reddit_Comments", "find", {"id": {"$in": [SAMPLE_REDDIT_ID]}}),
+    # Comments of a post, served by post_score
+    ("Reddit_Comments", "find", {"post_id": SAMPLE_REDDIT_ID}),
+]
+
+
+def _plan_stages(plan):
+    """
+    Yields every ``stage`` name found anywhere in an explain document.
+
+    Args:
+        plan (dict | list): An explain output or part of it.
+
+    Yields:
+        str: The stage names, e.g. "IXSCAN", "FETCH" or "COLLSCAN".
+    """
+    if isinstance(plan, dict):
+        for key, value in plan.items():
+            if key == "stage" and isinstance(value, str):
+                yield value
+            else:
+                yield from _plan_stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from _plan_stages(item)
+
+
+def explain_query_shape(collection_name, kind, query):
+    """
+    Runs explain for a single query shape.
+
+    Args:
+        collection_name (str): The name of the MongoDB collection.
+        kind (str): "find" or "aggregate".
+        query (dict | list): The find filter or the aggregation pipeline.
+
+    Returns:
+        dict: The explain output.
+    """
+    db = get_mongo_client()
+    if kind == "find":
+        return db[collection_name].find(query).explain()
+    return db.command(
+        "explain",
+        {"aggregate": collection_name, "pipeline": query, "cursor": {}},
+        verbosity="queryPlanner",
+    )
+
+
+def check_query_plans():
+    """
+    Explains every entry of QUERY_SHAPES and collects those that use a COLLSCAN.
+
+    Returns:
+        List[Tuple[str, str, Any]]: The query shapes that are not index-backed.
+    """
+    ensure_indexes()
+    collscans = []
+    for collection_name, kind, query in QUERY_SHAPES:
+        stages = set(_plan_stages(explain_query_shape(collection_name, kind, query)))
+        if "COLLSCAN" in stages:
+            logger.error(f"COLLSCAN on {collection_name} for {kind} {query}")
+            collscans.append((collection_name, kind, query))
+        else:
+            logger.info(f"Index used on {collection_name} for {kind} {query}")
+    return collscans
+
+
+if __name__ == "__main__":
+    sys.exit(1 if check_query_plans() else 0)
@@ -0,0 +1,238 @@
+"""
+Persistent, memory-mappable store of document embeddings.
+
+Vectors are kept as float16 rows in one flat file that readers memory-map, and
+an append-only JSON-lines index maps (article ID, content hash) to a row. A
+vector is only reused while the text it was computed from is unchanged, so
+the content hash is part of the key.
+
+Layout of EMBEDDING_STORE_DIR (default "embeddings"):
+    meta.json      {"dim": <vector length>}
+    vectors.f16    float16 rows, row-major
+    index.jsonl    one {"id", "hash", "row"} object per stored vector
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.utils.logger import setup_logger
+
+try:
+    import fcntl
+except ImportError:  # Windows: only in-process locking is available
+    fcntl = None
+
+logger = setup_logger()
+
+
+def content_hash(text: str) -> str:
+    """
+    Hashes the text an embedding was computed from.
+
+    Args:
+        text (str): The embedded text.
+
+    Returns:
+        str: Hex sha256 of the text.
+    """
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """
+    Append-only float16 embedding store shared by threads and processes.
+
+    Writers take an exclusive file lock while appending, so several worker
+    processes can add vectors to the same store. Readers pick up rows written
+    by other processes on their next lookup.
+    """
+
+    def __init__(self, directory: str):
+        """
+        Args:
+            directory (str): Directory holding the store files. Created if missing.
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._meta_path = os.path.join(directory, "meta.json")
+        self._vectors_path = os.path.join(directory, "vectors.f16")
+        self._index_path = os.path.join(directory, "index.jsonl")
+        self._lock = threading.Lock()
+        self._index = {}
+        self._index_offset = 0
+        self._dim = None
+        self._vectors = None
+        self.lookups = 0
+        self.hits = 0
+        self.lookup_seconds = 0.0
+
+    def _load_meta(self):
+        if self._dim is None and os.path.exists(self._meta_path):
+            with open(self._meta_path, encoding="utf-8") as f:
+                self._dim = json.load(f)["dim"]
+
+    def _refresh(self):
+        """
+        Reads index entries and rows appended since the last refresh. Caller holds the lock.
+        """
+        self._load_meta()
+        if not os.path.exists(self._index_path):
+            return
+        with open(self._index_path, encoding="utf-8") as f:
+            f.seek(self._index_offset)
+            for line in f:
+                if not line.endswith("\n"):
+                    break  # partially written line; read it next time
+                entry = json.loads(line)
+                self._index[(entry["id"], entry["hash"])] = entry["row"]
+                self._index_offset += len(line.encode("utf-8"))
+
+        rows = len(self._index) and max(self._index.values()) + 1
+        if rows and (self._vectors is None or self._vectors.shape[0] < rows):
+            self._vectors = np.memmap(
+                self._vectors_path, dtype=np.float16, mode="r", shape=(rows, self._dim)
+            )
+
+    def get_many(self, keys: List[Tuple[str, str]]) -> Dict[Tuple[str, str], np.ndarray]:
+        """
+        Looks up embeddings by (article ID, content hash).
+
+        Args:
+            keys (List[Tuple[str, str]]): The keys to look up.
+
+        Returns:
+            Dict[Tuple[str, str], np.ndarray]: float32 vectors for the keys that were found.
+        """
+        start = time.perf_counter()
+        with self._lock:
+            if any(key not in self._index for key in keys):
+                self._refresh()
+            found = {
+                key: np.asarray(self._vectors[self._index[key]], dtype=np.float32)
+                for key in keys
+                if key in self._index
+            }
+            self.lookups += len(keys)
+            self.hits += len(found)
+            self.lookup_seconds += time.perf_counter() - start
+        return found
+
+    def get_latest(self, article_ids: List[str]) -> Dict[str, np.ndarray]:
+        """
+        Returns the most recently stored embedding of each article, whatever its content hash.
+
+        Args:
+            article_ids (List[str]): The article IDs to look up.
+
+        Returns:
+            Dict[str, np.ndarray]: float32 vectors for the articles that have one.
+        """
+        with self._lock:
+            self._refresh()
+            latest = {}
+            for (article_id, _), row in self._index.items():
+                if row > latest.get(article_id, -1):
+                    latest[article_id] = row
+            return {
+                article_id: np.asarray(self._vectors[latest[article_id]], dtype=np.float32)
+                for article_id in article_ids
+                if article_id in latest
+            }
+
+    def put_many(self, items: Dict[Tuple[str, str], np.ndarray]):
+        """
+        Appends embeddings to the store.
+
+        Args:
+            items (Dict[Tuple[str, str], np.ndarray]): Vector per (article ID, content hash).
+        """
+        if not items:
+            return
+        matrix = np.asarray(list(items.values()), dtype=np.float16)
+        with self._lock, open(self._index_path, "a", encoding="utf-8") as index_file:
+            if fcntl is not None:
+                fcntl.flock(index_file, fcntl.LOCK_EX)
+            try:
+                self._load_meta()
+                if self._dim is None:
+                    self._dim = matrix.shape[1]
+                    with open(self._meta_path, "w", encoding="utf-8") as f:
+                        json.dump({"dim": self._dim}, f)
+                if matrix.shape[1] != self._dim:
+                    raise ValueError(
+                        f"Embedding length {matrix.shape[1]} does not match the store ({self._dim})"
+                    )
+                with open(self._vectors_path, "ab") as f:
+                    first_row = f.tell() // (self._dim * 2)
+                    f.write(matrix.tobytes())
+                index_file.write(
+                    "".join(
+                        json.dumps(
+                            {"id": article_id, "hash": digest, "row": first_row + i})
+                        + "\n"
+                        for i, (article_id, digest) in enumerate(items)
+                    )
+                )
+                index_file.flush()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(index_file, fcntl.LOCK_UN)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns size and lookup metrics of the store.
+
+        Returns:
+            Dict[str, float]: Stored vector count, bytes on disk, lookups, hit rate and mean lookup latency.
+        """
+        with self._lock:
+            size = sum(
+                os.path.getsize(path)
+                for path in (self._vectors_path, self._index_path, self._meta_path)
+                if os.path.exists(path)
+            )
+            return {
+                "vectors": len(self._index),
+                "size_bytes": size,
+                "lookups": self.lookups,
+                "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+                "mean_lookup_ms": (
+                    1000 * self.lookup_seconds / self.lookups if self.lookups else 0.0
+                ),
+            }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_embedding_store() -> EmbeddingStore:
+    """
+    Returns the process-wide embedding store in EMBEDDING_STORE_DIR.
+
+    Returns:
+        EmbeddingStore: The shared store.
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = EmbeddingStore(os.getenv("EMBEDDING_STORE_DIR", "embeddings"))
+    return _store
+
+
+def get_document_embeddings(article_ids: List[str]) -> Dict[str, np.ndarray]:
+    """
+    Returns the latest stored document embedding of each article without recomputing anything.
+
+    Args:
+        article_ids (List[str]): The article IDs to look up.
+
+    Returns:
+        Dict[str, np.ndarray]: float32 vectors for the articles that have one.
+    """
+    return get_embedding_store().get_latest(article_ids)
@@ -0,0 +1,135 @@
+"""
+Cross-request micro-batching for batch-capable pipeline stages.
+
+Coroutines submit one item at a time. Items arriving within a short window are
+collected and passed to the stage function as a single list, and each caller
+gets back its own result.
+"""
+import asyncio
+from typing import Any, Callable, List, Optional
+
+from src.utils.logger import setup_logger
+
+logger = setup_logger()
+
+
+def result_id(result: Any) -> Optional[str]:
+    """
+    Returns the article ID of a stage result, or None if it has none.
+
+    Stage functions return one dictionary with an ``id`` key per processed
+    article, but failed items may come back as a bare "" or [].
+
+    Args:
+        result (Any): A single element of a stage function's return value.
+
+    Returns:
+        Optional[str]: The article ID of the result.
+    """
+    return result.get("id") if isinstance(result, dict) else None
+
+
+class MicroBatcher:
+    """
+    Groups concurrent single-item requests into batched calls of a stage function.
+
+    A batch is dispatched when it reaches ``max_batch_size`` items or when
+    ``max_wait`` seconds have passed since its first item arrived. The stage
+    function runs on ``executor`` (the loop's default executor when None).
+
+    Example:
+        batcher = MicroBatcher(summarize_texts)
+        result = await batcher.submit(article_id)
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = 16,
+        max_wait: float = 0.05,
+        key: Callable[[Any], Any] = result_id,
+        executor=None,
+    ):
+        """
+        Args:
+            batch_fn (Callable[[List[Any]], List[Any]]): Blocking stage function taking a list of items.
+            max_batch_size (int): Maximum number of items per batched call.
+            max_wait (float): Seconds to wait for more items before dispatching a partial batch.
+            key (Callable[[Any], Any]): Maps a result of batch_fn back to the item it belongs to.
+            executor (concurrent.futures.Executor, optional): Where batch_fn runs.
+        """
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.key = key
+        self.executor = executor
+        self._loop = None
+        self._pending = []
+        self._timer = None
+
+    async def submit(self, item: Any) -> Any:
+        """
+        Queues an item for the next batch and waits for its result.
+
+        Args:
+            item (Any): The item to process, e.g. an article ID.
+
+        Returns:
+            Any: The result of batch_fn for this item, or None if it returned none.
+
+        Raises:
+            Exception: Whatever batch_fn raised for the batch containing the item.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # A new event loop (e.g. a new asyncio.run) starts with a clean batch
+            self._loop = loop
+            self._pending = []
+            self._timer = None
+
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        """
+        Dispatches the pending items as one batch.
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            self._loop.create_task(self._dispatch(batch))
+
+    async def _dispatch(self, batch):
+        """
+        Runs batch_fn for a batch and resolves the future of every caller in it.
+
+        Args:
+            batch (List[Tuple[Any, asyncio.Future]]): The queued items and their futures.
+        """
+        items = list(dict.fromkeys(item for item, _ in batch))
+        logger.debug(
+            f"Dispatching batch of {len(items)} items to {self.batch_fn.__name__}."
+        )
+        try:
+            results = await self._loop.run_in_executor(
+                self.executor, self.batch_fn, items
+            )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        by_key = {}
+        for result in results or []:
+            by_key.setdefault(self.key(result), result)
+        for item, future in batch:
+            if not future.done():
+                future.set_result(by_key.get(item))
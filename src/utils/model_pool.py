@@ -0,0 +1,252 @@
+"""
+Process pool for the CPU-bound model stages (KeyBERT keywords and sentiment).
+
+In the default thread pool the model stages contend for the GIL, and every
+thread's torch ops start their own intra-op thread pool, so the cores end up
+oversubscribed. The model pool runs them in worker processes instead:
+
+    - each worker loads the models once, in its initializer;
+    - each worker's torch and OpenMP/BLAS thread counts are the CPUs divided
+      by the workers (MODEL_POOL_TORCH_THREADS overrides it), so the pool as a
+      whole uses each core once;
+    - stage functions take article IDs (or texts) and return small result
+      dictionaries, so only those cross the process boundary.
+
+The pool is off unless MODEL_POOL_WORKERS is set above 0, since every worker
+holds its own copy of the models.
+"""
+import importlib
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+
+from src.utils.logger import setup_logger
+
+load_dotenv()
+
+logger = setup_logger()
+
+MODEL_POOL_WORKERS = int(os.getenv("MODEL_POOL_WORKERS", 0))
+MODEL_POOL_TORCH_THREADS = int(os.getenv("MODEL_POOL_TORCH_THREADS", 0))
+
+# Registry name of each preloaded model and the module that registers it
+POOL_MODELS = {
+    "keybert": "src.preprocessing.keyword_extraction",
+    "sentiment": "src.sentiment_analysis.sentiment_model",
+}
+
+# Thread pools other than torch's that would also scale with the CPU count
+THREAD_ENV_VARS = ["OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"]
+
+
+def threads_per_worker(workers: int, torch_threads: int = MODEL_POOL_TORCH_THREADS) -> int:
+    """
+    Returns the torch intra-op thread count for each of ``workers`` processes.
+
+    Args:
+        workers (int): Number of worker processes.
+        torch_threads (int): Explicit thread count; 0 splits the CPUs evenly.
+
+    Returns:
+        int: Threads per worker, at least 1.
+    """
+    if torch_threads > 0:
+        return torch_threads
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+@contextmanager
+def worker_thread_env(threads: int):
+    """
+    Sets the thread variables for processes started inside the block, restoring them afterwards.
+
+    A spawned worker inherits the environment when it starts and re-imports the
+    parent's ``__main__`` (and possibly torch with it) before its initializer
+    runs, so the OpenMP and BLAS runtimes read these variables before the
+    initializer could set them. They have to be in place in the parent.
+
+    Args:
+        threads (int): Threads per worker for OpenMP, MKL and OpenBLAS.
+    """
+    # The fast tokenizers would start a thread pool of their own per worker
+    values = {**{name: str(threads) for name in THREAD_ENV_VARS},
+              "TOKENIZERS_PARALLELISM": "false"}
+    saved = {name: os.environ.get(name) for name in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def worker_ready() -> int:
+    """
+    No-op task used to start every worker of a pool up front.
+
+    Returns:
+        int: The worker's process ID.
+    """
+    return os.getpid()
+
+
+def init_model_worker(torch_threads: int, models: Dict[str, str]):
+    """
+    Initializer of a model pool worker: sizes torch's thread pools and loads its models.
+
+    The OpenMP/BLAS thread variables are already set in the worker's
+    environment by create_model_pool (see worker_thread_env).
+
+    Args:
+        torch_threads (int): Intra-op threads for torch.
+        models (Dict[str, str]): Registry name of each model to load and the module registering it.
+    """
+    import torch
+
+    torch.set_num_threads(torch_threads)
+    torch.set_num_interop_threads(1)
+
+    from src.utils.model_registry import get_model
+
+    for name, module in models.items():
+        importlib.import_module(module)
+        get_model(name)
+    logger.info(
+        f"Model worker {os.getpid()} ready with {torch_threads} torch threads "
+        f"and models {list(models)}."
+    )
+
+
+def create_model_pool(
+    workers: int,
+    torch_threads: int = MODEL_POOL_TORCH_THREADS,
+    models: Optional[Dict[str, str]] = None,
+) -> ProcessPoolExecutor:
+    """
+    Creates a process pool whose workers hold the model stage models.
+
+    Workers are spawned rather than forked, as in the HTML extraction pool:
+    the parent runs threads (MongoDB pool, executors) that must not be copied
+    mid-operation, and torch does not survive a fork once initialized. All
+    workers are started here, inside worker_thread_env, so each one starts
+    with its share of threads in its environment.
+
+    Args:
+        workers (int): Number of worker processes.
+        torch_threads (int): Torch threads per worker; 0 splits the CPUs evenly.
+        models (Dict[str, str], optional): Models to preload. Defaults to POOL_MODELS.
+
+    Returns:
+        concurrent.futures.ProcessPoolExecutor: The new pool.
+    """
+    threads = threads_per_worker(workers, torch_threads)
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_model_worker,
+        initargs=(threads, POOL_MODELS if models is None else models),
+    )
+    # The pool starts a process per submitted task while none is idle
+    with worker_thread_env(threads):
+        for _ in range(workers):
+            pool.submit(worker_ready)
+    return pool
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_model_pool() -> Optional[ProcessPoolExecutor]:
+    """
+    Returns the shared model pool, creating it and starting its workers on first use.
+
+    Call it when the stages are about to run, not at import time: spawned
+    workers re-import the parent's ``__main__``.
+
+    Returns:
+        Optional[concurrent.futures.ProcessPoolExecutor]: The pool, or None if
+            MODEL_POOL_WORKERS is 0 and the stages should use the default thread pool.
+    """
+    global _pool
+    if MODEL_POOL_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = create_model_pool(MODEL_POOL_WORKERS)
+            logger.info(
+                f"Model pool: {MODEL_POOL_WORKERS} workers, "
+                f"{threads_per_worker(MODEL_POOL_WORKERS)} torch threads each."
+            )
+    return _pool
+
+
+def score_texts(texts):
+    """
+    Runs keyword extraction and sentiment analysis over texts in the current process.
+
+    Used by the scaling benchmark; unlike the pipeline stages it needs no database.
+
+    Args:
+        texts (List[str]): Texts to score.
+
+    Returns:
+        int: Number of texts scored.
+    """
+    from src.sentiment_analysis.sentiment_model import batched_inference
+    from src.utils.model_registry import get_model
+
+    keybert = get_model("keybert")
+    for text in texts:
+        keybert.extract_keywords(
+            text, keyphrase_ngram_range=(1, 2), stop_words="english", top_n=10)
+    batched_inference(get_model("sentiment"), texts)
+    return len(texts)
+
+
+if __name__ == "__main__":
+    # Throughput of the model stages with 1 to N worker processes:
+    #   python -m src.utils.model_pool [max_workers]
+    import json
+    import sys
+    import time
+
+    max_workers = int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count() or 1
+    with open("Kolkata_Murder_case_2024-08-21.json", encoding="utf-8") as f:
+        articles = json.load(f)["articles"]
+    texts = [
+        " ".join(filter(None, [a.get("title"), a.get("description"), a.get("content")]))
+        for a in articles
+    ]
+    texts = (texts * (256 // len(texts) + 1))[:256]
+    chunk = 16
+
+    counts = [1]
+    while counts[-1] * 2 <= max_workers:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != max_workers:
+        counts.append(max_workers)
+
+    baseline = None
+    for workers in counts:
+        with create_model_pool(workers) as pool:
+            # Start every worker and load its models before timing
+            list(pool.map(score_texts, [texts[:1]] * workers))
+            start = time.perf_counter()
+            list(pool.map(score_texts, [texts[i: i + chunk]
+                                        for i in range(0, len(texts), chunk)]))
+            elapsed = time.perf_counter() - start
+        rate = len(texts) / elapsed
+        baseline = baseline or rate
+        logger.info(
+            f"{workers} workers x {threads_per_worker(workers)} threads: "
+            f"{rate:.1f} texts/s ({rate / baseline:.2f}x)"
+        )
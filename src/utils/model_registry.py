@@ -0,0 +1,224 @@
+"""
+Process-wide registry of lazily loaded models.
+
+Stages register a loader under a name and call get_model() whenever they need
+the model. The first call loads it, later calls return the resident instance.
+An optional memory cap (MODEL_REGISTRY_MAX_MB) evicts the least recently used
+models once the estimated total size is exceeded.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from src.utils.logger import setup_logger
+
+logger = setup_logger()
+
+
+def _estimate_model_bytes(model):
+    """
+    Estimates the memory held by a model from its torch parameters and buffers.
+
+    Looks through the common wrapper attributes (``model``, ``embedding_model``)
+    used by transformers pipelines, KeyBERT and sentence-transformers.
+
+    Args:
+        model (Any): The loaded model object.
+
+    Returns:
+        int: The estimated size in bytes, or 0 if it cannot be determined.
+    """
+    candidates = [model]
+    seen = set()
+    while candidates:
+        obj = candidates.pop()
+        if obj is None or id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        if hasattr(obj, "parameters") and callable(obj.parameters):
+            try:
+                tensors = list(obj.parameters())
+                if hasattr(obj, "buffers"):
+                    tensors += list(obj.buffers())
+                return sum(t.numel() * t.element_size() for t in tensors)
+            except Exception:
+                pass
+        for attr in ("model", "embedding_model"):
+            candidates.append(getattr(obj, attr, None))
+    return 0
+
+
+class ModelRegistry:
+    """
+    Thread-safe, lazily loading model cache with optional LRU eviction.
+
+    Each model is loaded at most once while resident, even when several threads
+    ask for it at the same time. Loads of different models do not block each
+    other.
+    """
+
+    def __init__(self, max_bytes=None):
+        """
+        Args:
+            max_bytes (int, optional): Memory cap for resident models. No cap when None.
+        """
+        self.max_bytes = max_bytes
+        self._loaders = {}
+        self._models = OrderedDict()
+        self._sizes = {}
+        self._load_locks = {}
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def register(self, name, loader, size_bytes=None):
+        """
+        Registers a loader for a model. Re-registering a name keeps the resident model.
+
+        Args:
+            name (str): The name the model is requested by.
+            loader (Callable[[], Any]): Builds the model when it is first needed.
+            size_bytes (int, optional): Known model size; estimated after loading when None.
+        """
+        with self._lock:
+            self._loaders[name] = (loader, size_bytes)
+            self._load_locks.setdefault(name, threading.Lock())
+            self._stats.setdefault(
+                name, {"hits": 0, "misses": 0, "loads": 0, "load_seconds": 0.0}
+            )
+
+    def get(self, name):
+        """
+        Returns the named model, loading it on first use.
+
+        Args:
+            name (str): The name of a registered model.
+
+        Returns:
+            Any: The loaded model.
+
+        Raises:
+            KeyError: If no loader is registered under name.
+        """
+        with self._lock:
+            if name not in self._loaders:
+                raise KeyError(f"No model registered under '{name}'")
+            if name in self._models:
+                self._models.move_to_end(name)
+                self._stats[name]["hits"] += 1
+                return self._models[name]
+            load_lock = self._load_locks[name]
+
+        with load_lock:
+            # Another thread may have finished loading while we waited
+            with self._lock:
+                if name in self._models:
+                    self._models.move_to_end(name)
+                    self._stats[name]["hits"] += 1
+                    return self._models[name]
+                self._stats[name]["misses"] += 1
+                loader, size_bytes = self._loaders[name]
+
+            logger.info(f"Loading model '{name}'.")
+            start = time.perf_counter()
+            model = loader()
+            elapsed = time.perf_counter() - start
+            if size_bytes is None:
+                size_bytes = _estimate_model_bytes(model)
+            logger.info(
+                f"Loaded model '{name}' in {elapsed:.2f} s ({size_bytes / 1e6:.1f} MB)."
+            )
+
+            with self._lock:
+                self._models[name] = model
+                self._sizes[name] = size_bytes
+                self._stats[name]["loads"] += 1
+                self._stats[name]["load_seconds"] += elapsed
+                self._evict_over_cap(keep=name)
+            return model
+
+    def _evict_over_cap(self, keep):
+        """
+        Drops least recently used models until the total size fits the cap. Caller holds the lock.
+
+        Args:
+            keep (str): A model that must stay resident (the one just loaded).
+        """
+        if self.max_bytes is None:
+            return
+        for name in list(self._models):
+            if sum(self._sizes.values()) <= self.max_bytes:
+                break
+            if name == keep:
+                continue
+            del self._models[name]
+            del self._sizes[name]
+            logger.info(f"Evicted model '{name}' to stay under the memory cap.")
+
+    def evict(self, name):
+        """
+        Drops a resident model; it is reloaded on the next get().
+
+        Args:
+            name (str): The name of the model to evict.
+        """
+        with self._lock:
+            self._models.pop(name, None)
+            self._sizes.pop(name, None)
+
+    def stats(self):
+        """
+        Returns load-time and hit/miss counters per model.
+
+        Returns:
+            Dict[str, Dict[str, float]]: Counters per model name, plus whether it is resident and its size.
+        """
+        with self._lock:
+            return {
+                name: {
+                    **counters,
+                    "resident": name in self._models,
+                    "size_bytes": self._sizes.get(name, 0),
+                }
+                for name, counters in self._stats.items()
+            }
+
+
+_max_mb = os.getenv("MODEL_REGISTRY_MAX_MB")
+registry = ModelRegistry(
+    max_bytes=int(float(_max_mb) * 1e6) if _max_mb else None)
+
+
+def register_model(name, loader, size_bytes=None):
+    """
+    Registers a loader with the process-wide registry.
+
+    Args:
+        name (str): The name the model is requested by.
+        loader (Callable[[], Any]): Builds the model when it is first needed.
+        size_bytes (int, optional): Known model size; estimated after loading when None.
+    """
+    registry.register(name, loader, size_bytes)
+
+
+def get_model(name):
+    """
+    Returns a model from the process-wide registry, loading it on first use.
+
+    Args:
+        name (str): The name of a registered model.
+
+    Returns:
+        Any: The loaded model.
+    """
+    return registry.get(name)
+
+
+def model_stats():
+    """
+    Returns the counters of the process-wide registry.
+
+    Returns:
+        Dict[str, Dict[str, float]]: Counters per model name.
+    """
+    return registry.stats()
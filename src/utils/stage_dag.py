@@ -0,0 +1,261 @@
+"""
+Small DAG executor for per-article pipeline stages.
+
+Each stage declares the stages whose output it needs. An article enters a
+stage as soon as all of that stage's inputs are done for it, so stages that
+do not depend on each other (e.g. keywords after the summary, sentiment after
+the content) run concurrently instead of one after another.
+
+Every stage has a bounded input queue and a fixed number of workers. A worker
+that finishes an article hands it to the dependent stages, waiting while their
+queues are full, so a slow stage throttles the stages feeding it instead of
+letting work pile up in memory.
+"""
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from src.utils.logger import setup_logger
+
+logger = setup_logger()
+
+
+@dataclass
+class Stage:
+    """
+    One stage of a StageDAG.
+
+    Attributes:
+        name (str): The stage name, also the field whose presence marks the stage as done.
+        fn (Callable[[str], Awaitable[Any]]): Processes one article ID; a falsy result counts as a failure.
+        inputs (Sequence[str]): Names of the stages that must be done for an article first.
+        concurrency (int): Number of articles the stage processes at once.
+        queue_size (int): Articles that may wait for the stage before upstream workers block.
+    """
+
+    name: str
+    fn: Callable[[str], Awaitable[Any]]
+    inputs: Sequence[str] = ()
+    concurrency: int = 4
+    queue_size: int = 32
+
+
+class StageDAG:
+    """
+    Runs articles through stages ordered by their declared inputs.
+
+    Example:
+        dag = StageDAG([
+            Stage("summary", summarize, inputs=["content"]),
+            Stage("keywords", extract_keywords, inputs=["summary"]),
+            Stage("sentiment", analyze_sentiment, inputs=["content"]),
+            Stage("content", fetch_content),
+        ])
+        stats = await dag.run(article_ids, field_status)
+    """
+
+    def __init__(self, stages: Sequence[Stage]):
+        """
+        Args:
+            stages (Sequence[Stage]): The stages, in any order.
+
+        Raises:
+            ValueError: If a stage names an unknown input or the stages form a cycle.
+        """
+        self.stages = {stage.name: stage for stage in stages}
+        self.dependents = {name: [] for name in self.stages}
+        for stage in stages:
+            for name in stage.inputs:
+                if name not in self.stages:
+                    raise ValueError(
+                        f"Stage {stage.name} needs unknown stage {name}")
+                self.dependents[name].append(stage.name)
+        self.order = self._topological_order()
+
+    def _topological_order(self) -> List[str]:
+        """
+        Returns the stage names so that every stage comes after its inputs.
+
+        Raises:
+            ValueError: If the stages form a cycle.
+        """
+        remaining = {name: len(stage.inputs)
+                     for name, stage in self.stages.items()}
+        ready = [name for name, count in remaining.items() if count == 0]
+        order = []
+        while ready:
+            name = ready.pop()
+            order.append(name)
+            for dependent in self.dependents[name]:
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    ready.append(dependent)
+        if len(order) != len(self.stages):
+            raise ValueError("Stages form a cycle")
+        return order
+
+    async def run(
+        self,
+        article_ids: List[str],
+        field_status: Optional[Dict[str, Dict[str, bool]]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Runs every article through the stages it still needs.
+
+        A stage whose field is already present for an article is skipped for it.
+        If a stage fails for an article, the stages depending on it are skipped
+        for that article too.
+
+        Args:
+            article_ids (List[str]): IDs of the articles to process.
+            field_status (Dict[str, Dict[str, bool]], optional): Per article, which stage
+                fields already exist, as returned by content_status_many.
+
+        Returns:
+            Dict[str, Any]: Per stage, articles processed, already done, failed and
+            skipped, and the mean and maximum per-article latency in seconds.
+        """
+        field_status = field_status or {}
+        queues = {name: asyncio.Queue(maxsize=stage.queue_size)
+                  for name, stage in self.stages.items()}
+        # Per article: inputs still missing for each stage
+        waiting = {
+            article_id: {name: len(stage.inputs)
+                         for name, stage in self.stages.items()}
+            for article_id in article_ids
+        }
+        unresolved = {article_id: len(self.stages)
+                      for article_id in article_ids}
+        started = {}
+        latencies = []
+        counts = {name: {"processed": 0, "existing": 0, "failed": 0, "skipped": 0}
+                  for name in self.stages}
+        all_done = asyncio.Event()
+        if not article_ids:
+            all_done.set()
+
+        def resolve(article_id):
+            unresolved[article_id] -= 1
+            if unresolved[article_id] == 0:
+                latencies.append(time.perf_counter() - started[article_id])
+                if all(count == 0 for count in unresolved.values()):
+                    all_done.set()
+
+        async def fail(name, article_id):
+            # Everything downstream of a failed stage is skipped for the article
+            for dependent in self.dependents[name]:
+                if waiting[article_id][dependent] >= 0:
+                    waiting[article_id][dependent] = -1
+                    counts[dependent]["skipped"] += 1
+                    resolve(article_id)
+                    await fail(dependent, article_id)
+
+        async def complete(name, article_id):
+            for dependent in self.dependents[name]:
+                if waiting[article_id][dependent] < 0:
+                    continue
+                waiting[article_id][dependent] -= 1
+                if waiting[article_id][dependent] == 0:
+                    await enter(dependent, article_id)
+
+        async def enter(name, article_id):
+            if field_status.get(article_id, {}).get(name):
+                counts[name]["existing"] += 1
+                resolve(article_id)
+                await complete(name, article_id)
+            else:
+                await queues[name].put(article_id)
+
+        async def worker(name):
+            stage = self.stages[name]
+            while True:
+                article_id = await queues[name].get()
+                try:
+                    result = await stage.fn(article_id)
+                except Exception as e:
+                    logger.error(
+                        f"Stage {name} failed for article {article_id}: {e}")
+                    result = None
+                if result:
+                    counts[name]["processed"] += 1
+                    resolve(article_id)
+                    await complete(name, article_id)
+                else:
+                    counts[name]["failed"] += 1
+                    resolve(article_id)
+                    await fail(name, article_id)
+                queues[name].task_done()
+
+        async def feed():
+            roots = [name for name in self.order if not self.stages[name].inputs]
+            for article_id in article_ids:
+                started[article_id] = time.perf_counter()
+                for name in roots:
+                    await enter(name, article_id)
+
+        workers = [
+            asyncio.create_task(worker(name))
+            for name, stage in self.stages.items()
+            for _ in range(stage.concurrency)
+        ]
+        try:
+            await feed()
+            await all_done.wait()
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+        stats = {
+            "stages": counts,
+            "articles": len(article_ids),
+            "mean_latency": sum(latencies) / len(latencies) if latencies else 0.0,
+            "max_latency": max(latencies, default=0.0),
+        }
+        logger.info(f"Stage DAG finished: {stats}")
+        return stats
+
+
+if __name__ == "__main__":
+    # Per-article latency of the sequential chain vs the DAG with simulated stage times:
+    #   python -m src.utils.stage_dag
+    import random
+
+    STAGE_SECONDS = {"content": 0.3, "summary": 0.8,
+                     "keywords": 0.4, "sentiment": 0.5}
+
+    def _simulated(name):
+        async def _run(article_id):
+            await asyncio.sleep(STAGE_SECONDS[name] * random.uniform(0.8, 1.2))
+            return {"id": article_id}
+        return _run
+
+    async def _sequential(article_ids):
+        latencies = []
+
+        async def _one(article_id):
+            start = time.perf_counter()
+            for name in ("content", "summary", "keywords", "sentiment"):
+                await _simulated(name)(article_id)
+            latencies.append(time.perf_counter() - start)
+
+        await asyncio.gather(*[_one(article_id) for article_id in article_ids])
+        return sum(latencies) / len(latencies)
+
+    async def _dag(article_ids):
+        dag = StageDAG([
+            Stage("content", _simulated("content"), concurrency=16),
+            Stage("summary", _simulated("summary"), ["content"], concurrency=16),
+            Stage("keywords", _simulated("keywords"), ["summary"], concurrency=16),
+            Stage("sentiment", _simulated("sentiment"), ["content"], concurrency=16),
+        ])
+        return (await dag.run(article_ids))["mean_latency"]
+
+    ids = [f"article-{n}" for n in range(16)]
+    sequential = asyncio.run(_sequential(ids))
+    concurrent = asyncio.run(_dag(ids))
+    logger.info(
+        f"Mean per-article latency: sequential {sequential:.2f}s, DAG {concurrent:.2f}s "
+        f"({100 * (1 - concurrent / sequential):.0f}% lower)"
+    )
@@ -0,0 +1,18 @@
+import mongomock
+import pytest
+
+from src.utils import dbconnector
+
+
+@pytest.fixture
+def mongo(monkeypatch):
+    """
+    Points every MongoDB helper at a fresh in-memory mongomock client.
+
+    Returns:
+        mongomock.Database: The database the helpers now use.
+    """
+    client = mongomock.MongoClient()
+    monkeypatch.setenv("DB_NAME", "newsai_test")
+    monkeypatch.setattr(dbconnector, "_get_client", lambda: client)
+    return client["newsai_test"]
@@ -0,0 +1,98 @@
+import asyncio
+import threading
+import time
+
+from src.utils import async_dbconnector
+from src.utils.async_dbconnector import (AsyncBulkUpdater,
+                                         content_status_many_async,
+                                         find_documents_async,
+                                         find_one_document_async,
+                                         run_in_db_executor)
+
+
+async def measure_lag(stop, interval=0.005):
+    """
+    Returns the worst delay of the event loop in waking up a sleeping coroutine.
+    """
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - start - interval)
+    return worst
+
+
+def test_db_calls_run_off_the_event_loop(mongo):
+    mongo["News_Articles"].insert_one({"id": "a1", "content": "text"})
+
+    async def main():
+        loop_thread = threading.get_ident()
+        calls = await asyncio.gather(*[
+            run_in_db_executor(threading.get_ident) for _ in range(4)])
+        assert loop_thread not in calls
+
+        doc = await find_one_document_async("News_Articles", {"id": "a1"})
+        docs = await find_documents_async("News_Articles", {}, {"_id": 0, "id": 1})
+        status = await content_status_many_async(["a1", "a2"], ["content"])
+        return doc["content"], docs, status
+
+    content, docs, status = asyncio.run(main())
+    assert content == "text"
+    assert docs == [{"id": "a1"}]
+    assert status == {"a1": {"content": True}, "a2": {"content": False}}
+
+
+def test_slow_db_calls_do_not_stall_the_event_loop(mongo, monkeypatch):
+    def slow_content_manager(article_id, required_fields):
+        time.sleep(0.1)  # a slow MongoDB round trip
+        return {field: False for field in required_fields}
+
+    monkeypatch.setattr(async_dbconnector, "content_manager", slow_content_manager)
+
+    async def main():
+        stop = asyncio.Event()
+        monitor = asyncio.create_task(measure_lag(stop))
+        await asyncio.gather(*[
+            async_dbconnector.content_manager_async(f"a{i}", ["content"])
+            for i in range(32)
+        ])
+        stop.set()
+        return await monitor
+
+    assert asyncio.run(main()) < 0.05
+
+
+def test_async_bulk_updater_merges_and_flushes_on_exit(mongo):
+    articles = mongo["News_Articles"]
+    articles.insert_many([{"id": "a1"}, {"id": "a2"}])
+
+    async def main():
+        async with AsyncBulkUpdater("News_Articles", flush_interval=60) as updater:
+            await updater.update("a1", {"summary": "s"})
+            await updater.update("a1", {"keywords": ["k"]})
+            await updater.update("a2", {"summary": "t"})
+            # Buffered until the context manager exits
+            assert articles.find_one({"id": "a1"}).get("summary") is None
+        return updater._updater
+
+    updater = asyncio.run(main())
+    assert articles.find_one({"id": "a1"}, {"_id": 0}) == {
+        "id": "a1", "summary": "s", "keywords": ["k"]}
+    assert articles.find_one({"id": "a2"})["summary"] == "t"
+    assert updater.modified_count == 2
+
+
+def test_async_bulk_updater_flushes_at_batch_size(mongo):
+    articles = mongo["News_Articles"]
+    articles.insert_many([{"id": f"a{i}"} for i in range(5)])
+
+    async def main():
+        updater = AsyncBulkUpdater("News_Articles", batch_size=2, flush_interval=60)
+        for i in range(3):
+            await updater.update(f"a{i}", {"summary": f"s{i}"})
+        written = articles.count_documents({"summary": {"$exists": True}})
+        await updater.flush()
+        return written
+
+    assert asyncio.run(main()) == 2
+    assert articles.count_documents({"summary": {"$exists": True}}) == 3
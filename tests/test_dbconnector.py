@@ -0,0 +1,138 @@
+import time
+
+import pytest
+from pymongo.errors import BulkWriteError
+
+from src.utils.dbconnector import BulkUpdater
+
+
+def test_buffered_updates_are_flushed_by_the_timer(mongo):
+    articles = mongo["News_Articles"]
+    articles.insert_one({"id": "a1"})
+
+    updater = BulkUpdater("News_Articles", flush_interval=0.1)
+    updater.update("a1", {"summary": "s"})
+    assert articles.find_one({"id": "a1"}).get("summary") is None
+
+    # No further update arrives, the timer writes the buffer anyway
+    deadline = time.monotonic() + 2
+    while articles.find_one({"id": "a1"}).get("summary") is None:
+        assert time.monotonic() < deadline, "buffered update was never flushed"
+        time.sleep(0.02)
+    assert updater.modified_count == 1
+
+
+def test_failed_flush_keeps_pending_updates(mongo, monkeypatch):
+    articles = mongo["News_Articles"]
+    articles.insert_many([{"id": "a1"}, {"id": "a2"}])
+    collection_type = type(articles)
+    bulk_write = collection_type.bulk_write
+    calls = {"count": 0}
+
+    def failing_once(self, *args, **kwargs):
+        calls["count"] += 1
+        if calls["count"] == 1:
+            raise BulkWriteError({"writeErrors": []})
+        return bulk_write(self, *args, **kwargs)
+
+    monkeypatch.setattr(collection_type, "bulk_write", failing_once)
+
+    updater = BulkUpdater("News_Articles", flush_interval=60)
+    updater.update("a1", {"summary": "old", "keywords": ["k"]})
+    with pytest.raises(BulkWriteError):
+        updater.flush()
+    # A newer update to the same key wins over the retained one
+    updater.update("a1", {"summary": "new"})
+    updater.update("a2", {"summary": "t"})
+    updater.flush()
+
+    assert articles.find_one({"id": "a1"}, {"_id": 0}) == {
+        "id": "a1", "summary": "new", "keywords": ["k"]}
+    assert articles.find_one({"id": "a2"})["summary"] == "t"
+
+
+def test_rejected_updates_are_dropped_and_the_rest_written(mongo):
+    articles = mongo["News_Articles"]
+    articles.create_index("url", unique=True)
+    articles.insert_one({"id": "a1", "url": "https://example.com/1"})
+
+    updater = BulkUpdater("News_Articles", flush_interval=None, upsert=True)
+    updater.update("a2", {"url": "https://example.com/1"})  # duplicate key
+    updater.update("a3", {"url": "https://example.com/3"})
+    updater.flush()
+
+    assert articles.find_one({"id": "a2"}) is None
+    assert articles.find_one({"id": "a3"})["url"] == "https://example.com/3"
+    # The rejected update is not retried by later flushes
+    updater.update("a4", {"url": "https://example.com/4"})
+    updater.flush()
+    assert articles.count_documents({}) == 3
+
+
+def test_only_transiently_failed_updates_are_retried(mongo, monkeypatch):
+    articles = mongo["News_Articles"]
+    articles.insert_many([{"id": "a1"}, {"id": "a2"}, {"id": "a3"}])
+    collection_type = type(articles)
+    bulk_write = collection_type.bulk_write
+    batches = []
+
+    def partly_failing(self, operations, *args, **kwargs):
+        batches.append([op._filter["id"] for op in operations])
+        if len(batches) > 1:
+            return bulk_write(self, operations, *args, **kwargs)
+        # a1 is written, a2 hits an election, a3 is rejected
+        bulk_write(self, operations[:1], *args, **kwargs)
+        raise BulkWriteError({
+            "writeErrors": [
+                {"index": 1, "code": 189, "errmsg": "primary stepped down"},
+                {"index": 2, "code": 121, "errmsg": "document failed validation"},
+            ],
+            "nMatched": 1, "nModified": 1,
+        })
+
+    monkeypatch.setattr(collection_type, "bulk_write", partly_failing)
+
+    updater = BulkUpdater("News_Articles", flush_interval=None)
+    for article_id in ("a1", "a2", "a3"):
+        updater.update(article_id, {"summary": article_id})
+    with pytest.raises(BulkWriteError):
+        updater.flush()
+    updater.flush()
+
+    assert batches == [["a1", "a2", "a3"], ["a2"]]
+    assert [a.get("summary") for a in articles.find({}, sort=[("id", 1)])] == ["a1", "a2", None]
+    assert updater.modified_count == 2
+
+
+def test_updates_without_flush_interval_wait_for_batch_size(mongo):
+    articles = mongo["News_Articles"]
+    articles.insert_many([{"id": "a1"}, {"id": "a2"}])
+
+    updater = BulkUpdater("News_Articles", batch_size=2, flush_interval=None)
+    updater.update("a1", {"summary": "s"})
+    assert articles.find_one({"id": "a1"}).get("summary") is None
+    updater.update("a2", {"summary": "t"})
+
+    assert articles.count_documents({"summary": {"$exists": True}}) == 2
+
+
+def test_failed_timed_flush_is_logged(mongo, monkeypatch, caplog):
+    articles = mongo["News_Articles"]
+    articles.insert_one({"id": "a1"})
+
+    def unavailable(self, *args, **kwargs):
+        raise ConnectionError("server unavailable")
+
+    monkeypatch.setattr(type(articles), "bulk_write", unavailable)
+    updater = BulkUpdater("News_Articles", flush_interval=0.05)
+    updater.update("a1", {"summary": "s"})
+
+    deadline = time.monotonic() + 2
+    while "Timed flush of News_Articles failed" not in caplog.text:
+        assert time.monotonic() < deadline, "timed flush failure was not logged"
+        time.sleep(0.02)
+    # Stop the retries and wait for one in progress
+    updater.flush_interval = None
+    with updater._flush_lock:
+        pass
+    assert updater._pending == {"a1": {"summary": "s"}}
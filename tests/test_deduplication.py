@@ -0,0 +1,19 @@
+import json
+import os
+
+from src.preprocessing.deduplication import cluster_near_duplicates, dedup_text
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "..", "Kolkata_Murder_case_2024-08-21.json")
+
+
+def test_saved_results_group_only_republished_stories():
+    with open(FIXTURE, encoding="utf-8") as f:
+        articles = json.load(f)["articles"]
+
+    groups = cluster_near_duplicates({a["url"]: dedup_text(a) for a in articles})
+
+    duplicates = {r: d for r, d in groups.items() if d}
+    assert len(duplicates) == 2
+    # The same Times of India story under its /india/ and /city/kolkata/ URLs
+    for representative, (duplicate,) in duplicates.items():
+        assert representative.rsplit("/", 1)[-1] == duplicate.rsplit("/", 1)[-1]
@@ -0,0 +1,229 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.ingestion.fetch_articles import (fetch_article_content,
+                                          stale_content_ids_async)
+from src.ingestion.http_fetcher import (ArticleFetcher, CircuitBreaker,
+                                        CircuitOpenError, ResponseTooLarge)
+
+PAGE = "<html><body><article><p>{}</p></article></body></html>"
+
+
+def build_app(state):
+    """
+    Stub publisher: slow pages, a huge page, a hanging page and an ETag-validated page.
+    """
+    async def slow(request):
+        state["in_flight"] += 1
+        state["max_in_flight"] = max(state["max_in_flight"], state["in_flight"])
+        await asyncio.sleep(0.05)
+        state["in_flight"] -= 1
+        return web.Response(text=PAGE.format("slow"), content_type="text/html")
+
+    async def huge(request):
+        return web.Response(body=b"x" * 4096, content_type="text/html")
+
+    async def huge_chunked(request):
+        # No Content-Length, so the cap has to stop the streamed body
+        response = web.StreamResponse()
+        response.enable_chunked_encoding()
+        await response.prepare(request)
+        for _ in range(8):
+            await response.write(b"x" * 1024)
+        await response.write_eof()
+        return response
+
+    async def hang(request):
+        await asyncio.sleep(5)
+        return web.Response(text="too late")
+
+    async def validated(request):
+        state["validated_requests"] += 1
+        etag = f'"v{state["version"]}"'
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers={"ETag": etag})
+        text = PAGE.format(f"A long enough paragraph of article text, version {state['version']}.")
+        return web.Response(text=text, content_type="text/html", headers={"ETag": etag})
+
+    async def plain(request):
+        # No validators: every revalidation is a full 200
+        text = PAGE.format(f"A long enough paragraph of article text, edition {state['edition']}.")
+        return web.Response(text=text, content_type="text/html")
+
+    async def unavailable(request):
+        return web.Response(status=503)
+
+    app = web.Application()
+    app.router.add_get("/slow/{n}", slow)
+    app.router.add_get("/huge", huge)
+    app.router.add_get("/huge-chunked", huge_chunked)
+    app.router.add_get("/hang", hang)
+    app.router.add_get("/validated", validated)
+    app.router.add_get("/unavailable", unavailable)
+    app.router.add_get("/plain", plain)
+    return app
+
+
+@pytest.fixture
+def stub_server():
+    """
+    Runs a test body against the stub publisher: ``stub_server(body)`` with ``body(base_url, state)``.
+    """
+    def _run(body, **fetcher_kwargs):
+        state = {"in_flight": 0, "max_in_flight": 0,
+                 "validated_requests": 0, "version": 1, "edition": 1}
+
+        async def _main():
+            async with TestServer(build_app(state)) as server:
+                base = str(server.make_url("")).rstrip("/")
+                fetcher_kwargs.setdefault("max_attempts", 1)
+                async with ArticleFetcher(**fetcher_kwargs) as fetcher:
+                    return await body(fetcher, base, state)
+
+        return asyncio.run(_main())
+    return _run
+
+
+def test_requests_per_host_are_bounded(stub_server):
+    async def body(fetcher, base, state):
+        await asyncio.gather(*[fetcher.fetch(f"{base}/slow/{n}") for n in range(12)])
+        return state["max_in_flight"]
+
+    assert stub_server(body, limit_per_host=3) == 3
+
+
+@pytest.mark.parametrize("path", ["/huge", "/huge-chunked"])
+def test_oversized_responses_are_rejected(stub_server, path):
+    async def body(fetcher, base, state):
+        with pytest.raises(ResponseTooLarge):
+            await fetcher.fetch(base + path)
+
+    stub_server(body, max_bytes=2048)
+
+
+def test_hanging_response_times_out(stub_server):
+    async def body(fetcher, base, state):
+        start = time.perf_counter()
+        with pytest.raises(asyncio.TimeoutError):
+            await fetcher.fetch(f"{base}/hang")
+        return time.perf_counter() - start
+
+    assert stub_server(body, read_timeout=0.2) < 2
+
+
+def test_conditional_get_returns_not_modified(stub_server):
+    async def body(fetcher, base, state):
+        first = await fetcher.fetch(f"{base}/validated")
+        again = await fetcher.fetch(f"{base}/validated", etag=first.etag)
+        state["version"] = 2
+        changed = await fetcher.fetch(f"{base}/validated", etag=first.etag)
+        return first, again, changed
+
+    first, again, changed = stub_server(body)
+    assert first.etag == '"v1"' and "version 1" in first.text
+    assert again.not_modified and again.text is None
+    assert not changed.not_modified and "version 2" in changed.text
+
+
+def test_stale_content_is_revalidated(stub_server, mongo):
+    articles = mongo["News_Articles"]
+
+    async def body(fetcher, base, state):
+        articles.insert_one({"id": "a1", "url": f"{base}/validated"})
+        await fetch_article_content(["a1"], fetcher)
+        assert await stale_content_ids_async(["a1"]) == []
+
+        # Unchanged page: only the fetch time moves
+        old = datetime.now(timezone.utc) - timedelta(days=2)
+        articles.update_one({"id": "a1"}, {"$set": {"fetched_at": old, "summary": "s"}})
+        assert await stale_content_ids_async(["a1"]) == ["a1"]
+        await fetch_article_content(["a1"], fetcher, refresh=True)
+        assert await stale_content_ids_async(["a1"]) == []
+        assert articles.find_one({"id": "a1"})["summary"] == "s"
+
+        # Changed page: new content, derived fields cleared for re-processing
+        state["version"] = 2
+        articles.update_one({"id": "a1"}, {"$set": {"fetched_at": old}})
+        await fetch_article_content(["a1"], fetcher, refresh=True)
+        return state["validated_requests"]
+
+    assert stub_server(body) == 3
+    doc = articles.find_one({"id": "a1"})
+    assert "version 2" in doc["content"]
+    assert doc["etag"] == '"v2"'
+    assert doc["summary"] is None
+
+
+def test_cancelled_probe_releases_half_open_circuit(stub_server):
+    async def body(fetcher, base, state):
+        domain = base.split("//")[1]
+        for _ in range(fetcher.breaker.failure_threshold):
+            fetcher.breaker.record_failure(domain)
+        await asyncio.sleep(fetcher.breaker.cooldown)
+        assert fetcher.breaker.state(domain) == "half_open"
+
+        probe = asyncio.create_task(fetcher.fetch(f"{base}/hang"))
+        await asyncio.sleep(0.1)
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+        # The next request becomes the probe and closes the circuit
+        result = await fetcher.fetch(f"{base}/slow/1")
+        return result.status, fetcher.breaker.state(domain)
+
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=0.1)
+    assert stub_server(body, breaker=breaker) == (200, "closed")
+
+
+def test_retry_blocked_by_open_circuit_counts_as_failure(stub_server):
+    async def body(fetcher, base, state):
+        with pytest.raises(CircuitOpenError):
+            await fetcher.fetch(f"{base}/unavailable")
+        with pytest.raises(CircuitOpenError):
+            await fetcher.fetch(f"{base}/unavailable")
+        return fetcher.stats()
+
+    stats = stub_server(
+        body, breaker=CircuitBreaker(failure_threshold=1, cooldown=60),
+        max_attempts=3, max_backoff=0.01,
+    )
+    assert stats["requests"] == 1
+    assert stats["failures"] == 1
+    assert stats["skipped"] == 1
+
+
+def test_unchanged_text_without_validators_keeps_results(stub_server, mongo):
+    articles = mongo["News_Articles"]
+    old = datetime.now(timezone.utc) - timedelta(days=2)
+
+    async def body(fetcher, base, state):
+        # Stored before hashes and fetch times were recorded
+        articles.insert_one({"id": "a1", "url": f"{base}/plain"})
+        await fetch_article_content(["a1"], fetcher)
+        content = articles.find_one({"id": "a1"})["content"]
+        articles.update_one({"id": "a1"}, {
+            "$set": {"summary": "s", "fetched_at": old},
+            "$unset": {"content_hash": ""}})
+        articles.insert_one({"id": "a2", "url": f"{base}/plain",
+                             "content": content, "summary": "t"})
+
+        assert sorted(await stale_content_ids_async(["a1", "a2"])) == ["a1", "a2"]
+        await fetch_article_content(["a1", "a2"], fetcher, refresh=True)
+        assert await stale_content_ids_async(["a1", "a2"]) == []
+        unchanged = {doc["id"]: doc["summary"] for doc in articles.find()}
+
+        state["edition"] = 2
+        articles.update_many({}, {"$set": {"fetched_at": old}})
+        await fetch_article_content(["a1"], fetcher, refresh=True)
+        return unchanged
+
+    assert stub_server(body) == {"a1": "s", "a2": "t"}
+    doc = articles.find_one({"id": "a1"})
+    assert "edition 2" in doc["content"]
+    assert doc["summary"] is None
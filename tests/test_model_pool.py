@@ -0,0 +1,24 @@
+import os
+
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from src.utils.model_pool import create_model_pool  # noqa: E402
+
+
+def worker_threads(_):
+    import torch
+
+    return os.getpid(), os.environ.get("OMP_NUM_THREADS"), torch.get_num_threads()
+
+
+def test_workers_start_with_their_share_of_threads():
+    before = os.environ.get("OMP_NUM_THREADS")
+    with create_model_pool(2, torch_threads=3, models={}) as pool:
+        results = list(pool.map(worker_threads, range(8)))
+
+    assert len({pid for pid, _, _ in results}) <= 2
+    assert all(omp == "3" and threads == 3 for _, omp, threads in results)
+    # The parent's own environment is left as it was
+    assert os.environ.get("OMP_NUM_THREADS") == before
@@ -0,0 +1,165 @@
+import asyncio
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.ingestion import newsapi
+from src.ingestion.newsapi import article_id_for_url, fetch_news_async, normalize_url
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "..", "Kolkata_Murder_case_2024-08-21.json")
+
+
+def run_against(app, monkeypatch, body):
+    """
+    Runs ``body()`` while NewsAPI requests go to a local stand-in app.
+    """
+    async def _main():
+        async with TestServer(app) as server:
+            monkeypatch.setattr(newsapi, "NEWSAPI_URL",
+                                str(server.make_url("/v2/everything")))
+            return await body()
+
+    return asyncio.run(_main())
+
+
+@pytest.fixture
+def saved():
+    with open(FIXTURE, encoding="utf-8") as f:
+        return sorted(json.load(f)["articles"], key=lambda a: a["publishedAt"])
+
+
+@pytest.fixture
+def stand_in(saved):
+    """
+    NewsAPI stand-in serving the saved Kolkata results page by page.
+
+    Only articles published up to state["now"] exist. Each request is
+    recorded as (page, requests in flight when it arrived). An application
+    is bound to one event loop, so each run gets a new one.
+    """
+    state = {"articles": saved, "now": saved[-1]["publishedAt"],
+             "requests": [], "in_flight": 0, "served": 0}
+
+    async def everything(request):
+        page = int(request.query.get("page", 1))
+        size = int(request.query.get("pageSize", 100))
+        since = request.query.get("from", "")
+        matching = [a for a in state["articles"] if since <= a["publishedAt"] <= state["now"]]
+        articles = matching[(page - 1) * size: page * size]
+        state["in_flight"] += 1
+        state["requests"].append((page, state["in_flight"]))
+        state["served"] += len(articles)
+        try:
+            await asyncio.sleep(0.05)
+        finally:
+            state["in_flight"] -= 1
+        return web.json_response(
+            {"status": "ok", "totalResults": len(matching), "articles": articles})
+
+    def make_app():
+        app = web.Application()
+        app.router.add_get("/v2/everything", everything)
+        return app
+
+    return make_app, state
+
+
+def fetch(query, limit=100, page_size=100, refresh_ttl=newsapi.QUERY_REFRESH_TTL):
+    return lambda: fetch_news_async(
+        query, "2024-08-01", "publishedAt", limit, False, page_size, refresh_ttl=refresh_ttl)
+
+
+def test_first_page_then_remaining_pages_concurrently(mongo, monkeypatch, stand_in, saved):
+    make_app, state = stand_in
+    ids = run_against(make_app(), monkeypatch, fetch("kolkata", limit=100, page_size=10))
+
+    pages = [page for page, _ in state["requests"]]
+    assert pages[0] == 1
+    assert sorted(pages[1:]) == list(range(2, 11))
+    # Page 1 had been answered when the next request arrived; the rest overlapped
+    assert state["requests"][1][1] == 1
+    assert max(in_flight for _, in_flight in state["requests"][1:]) > 1
+    assert len(ids) == len(set(ids)) == len(saved)
+    assert mongo["News_Articles"].count_documents({}) == len(saved)
+
+
+def test_article_ids_are_stable_across_runs(mongo, monkeypatch, stand_in, saved):
+    make_app, _ = stand_in
+    expected = {article_id_for_url(normalize_url(a["url"])) for a in saved}
+
+    first = run_against(make_app(), monkeypatch, fetch("kolkata"))
+    # Another query listing the same articles, and a fresh database
+    second = run_against(make_app(), monkeypatch, fetch("kolkata murder"))
+    mongo["News_Articles"].delete_many({})
+    mongo["News_Articles_Ids"].delete_many({})
+    third = run_against(make_app(), monkeypatch, fetch("kolkata"))
+
+    assert set(first) == set(second) == set(third) == expected
+
+
+def test_tracking_parameter_copies_collapse(mongo, monkeypatch, stand_in, saved):
+    make_app, state = stand_in
+    copies = []
+    for article in saved[:20]:
+        url = article["url"]
+        separator = "&" if "?" in url else "?"
+        copies.append({**article, "url": f"{url}{separator}utm_source=feed&fbclid=x#top"})
+    state["articles"] = sorted(saved + copies, key=lambda a: a["publishedAt"])
+
+    ids = run_against(make_app(), monkeypatch, fetch("kolkata", limit=200))
+
+    assert len(ids) == len(set(ids)) == len(saved)
+    assert mongo["News_Articles"].count_documents({}) == len(saved)
+
+
+def test_refresh_requests_only_articles_after_watermark(mongo, monkeypatch, stand_in, saved):
+    make_app, state = stand_in
+    state["now"] = saved[len(saved) // 2]["publishedAt"]
+    first = run_against(make_app(), monkeypatch, fetch("kolkata"))
+    assert len(first) == len(saved) // 2 + 1
+
+    # Within the TTL NewsAPI is not asked at all
+    state["requests"].clear()
+    assert run_against(make_app(), monkeypatch, fetch("kolkata")) == []
+    assert state["requests"] == []
+
+    state["now"] = saved[-1]["publishedAt"]
+    state["served"] = 0
+    delta = run_against(make_app(), monkeypatch, fetch("kolkata", refresh_ttl=timedelta(0)))
+
+    assert set(delta) == {article_id_for_url(a["url"]) for a in saved[len(saved) // 2 + 1:]}
+    # "from" is inclusive, so only the watermark article is sent again
+    assert state["served"] == len(delta) + 1
+    stored = mongo["News_Articles_Ids"].find_one({"query": "kolkata"})
+    assert set(stored["ids"]) == set(first) | set(delta)
+
+
+@pytest.mark.parametrize("response", [
+    web.Response(status=429),
+    web.json_response({"status": "error", "code": "rateLimited"}),
+])
+def test_failed_refresh_returns_no_ids_and_keeps_watermark(mongo, monkeypatch, response):
+    refreshed_at = datetime.now(timezone.utc) - timedelta(days=1)
+    record = {"query": "kolkata", "ids": ["a1", "a2"],
+              "latest_published_at": "2024-08-20T10:00:00Z",
+              "refreshed_at": refreshed_at}
+    mongo["News_Articles_Ids"].insert_one(dict(record))
+
+    async def everything(request):
+        return response
+
+    app = web.Application()
+    app.router.add_get("/v2/everything", everything)
+    ids = run_against(app, monkeypatch, lambda: fetch_news_async(
+        "kolkata", "2024-08-01", "publishedAt", 100, False))
+
+    assert ids == []
+    stored = mongo["News_Articles_Ids"].find_one({"query": "kolkata"}, {"_id": 0})
+    assert stored["ids"] == record["ids"]
+    assert stored["latest_published_at"] == record["latest_published_at"]
+    # Not marked as refreshed, so the next call tries NewsAPI again
+    assert stored["refreshed_at"].replace(tzinfo=timezone.utc) < refreshed_at + timedelta(seconds=1)
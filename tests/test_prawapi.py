@@ -0,0 +1,132 @@
+import json
+from urllib.parse import urlparse
+
+import pytest
+import requests
+
+from src.ingestion.prawapi import configure_reddit, fetch_reddit_posts_by_keyword
+
+POSTS = 6
+COMMENTS = 20
+MORE_STUBS = 5
+
+
+def _listing(children):
+    return {"kind": "Listing", "data": {"after": None, "before": None, "children": children}}
+
+
+def _post(n):
+    return {"kind": "t3", "data": {
+        "id": f"p{n}", "name": f"t3_p{n}", "title": f"Post {n}", "selftext": "Body\nof the post",
+        "url": f"https://example.com/{n}", "subreddit": "test", "score": n,
+        "num_comments": COMMENTS, "created_utc": 1_724_200_000 + n, "stickied": False,
+        "author": "someone",
+    }}
+
+
+def comment_score(n):
+    # Scores out of order, so keeping the first comments would not pass
+    return (n * 7) % COMMENTS
+
+
+def _comment(post_id, n):
+    return {"kind": "t1", "data": {
+        "id": f"{post_id}c{n}", "name": f"t1_{post_id}c{n}", "body": f"Comment\n{n}",
+        "score": comment_score(n), "created_utc": 1_724_200_000 + n, "replies": "",
+        "parent_id": f"t3_{post_id}", "link_id": f"t3_{post_id}", "author": "someone",
+    }}
+
+
+def _more(post_id, n):
+    return {"kind": "more", "data": {
+        "count": 10, "name": f"t1_{post_id}m{n}", "id": f"{post_id}m{n}",
+        "parent_id": f"t3_{post_id}", "depth": 0,
+        "children": [f"{post_id}m{n}x{k}" for k in range(10)],
+    }}
+
+
+class StubSession(requests.Session):
+    """
+    Answers PRAW's search, comment and "load more" requests from synthetic listings.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.paths = []
+
+    def request(self, method, url, *args, **kwargs):
+        path = urlparse(url).path.rstrip("/")
+        self.paths.append(path)
+        if path.endswith("/access_token"):
+            body = {"access_token": "stub", "expires_in": 3600,
+                    "scope": "*", "token_type": "bearer"}
+        elif path.endswith("/search"):
+            body = _listing([_post(n) for n in range(POSTS)])
+        elif path.startswith("/comments/"):
+            post_id = path.split("/")[2]
+            body = [
+                _listing([_post(int(post_id[1:]))]),
+                _listing([_comment(post_id, n) for n in range(COMMENTS)]
+                         + [_more(post_id, n) for n in range(MORE_STUBS)]),
+            ]
+        elif path.endswith("/morechildren"):
+            body = {"json": {"errors": [], "data": {"things": []}}}
+        else:
+            raise ValueError(f"Unexpected request: {method} {url}")
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response.headers["content-type"] = "application/json"
+        response._content = json.dumps(body).encode("utf-8")
+        return response
+
+    def count(self, suffix):
+        return sum(path.endswith(suffix) for path in self.paths)
+
+
+@pytest.fixture
+def reddit(mongo):
+    session = StubSession()
+    configure_reddit(
+        client_id="stub", client_secret="stub", user_agent="stub", username="stub",
+        password="stub", requestor_kwargs={"session": session},
+    )
+    return session
+
+
+def test_keeps_top_comments_by_score(reddit, mongo):
+    posts = fetch_reddit_posts_by_keyword("stub", limit=POSTS, comment_count=3)
+
+    best = sorted(range(COMMENTS), key=comment_score, reverse=True)[:3]
+    for post in posts:
+        comments = post["top_comments"]
+        assert [c["comment_id"] for c in comments] == [f"{post['id']}c{n}" for n in best]
+        assert [c["comment_score"] for c in comments] == [comment_score(n) for n in best]
+        assert comments[0]["comment_content"] == f"Comment {best[0]}"
+        stored = mongo["Reddit_Posts"].find_one({"id": post["id"]})
+        assert stored["top_comment_ids"] == [c["comment_id"] for c in comments]
+
+
+@pytest.mark.parametrize("limit", [0, 2])
+def test_replace_more_expands_at_most_limit_stubs(reddit, limit):
+    fetch_reddit_posts_by_keyword("stub", limit=POSTS, replace_more_limit=limit)
+
+    assert reddit.count("/morechildren") == POSTS * limit
+
+
+def test_repeated_runs_upsert_without_duplicates(reddit, mongo):
+    fetch_reddit_posts_by_keyword("stub", limit=POSTS, comment_count=4)
+    fetch_reddit_posts_by_keyword("stub", limit=POSTS, comment_count=4)
+
+    assert mongo["Reddit_Posts"].count_documents({}) == POSTS
+    assert len(mongo["Reddit_Posts"].distinct("id")) == POSTS
+    assert mongo["Reddit_Comments"].count_documents({}) == POSTS * 4
+    assert len(mongo["Reddit_Comments"].distinct("id")) == POSTS * 4
+
+
+def test_clients_and_tokens_are_reused_across_calls(reddit):
+    for _ in range(3):
+        fetch_reddit_posts_by_keyword("stub", limit=POSTS, max_workers=2)
+
+    # One client (and token) for the searching thread and each of the two workers
+    assert reddit.count("/access_token") <= 3
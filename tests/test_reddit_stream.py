@@ -0,0 +1,146 @@
+import json
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import requests
+
+from src.ingestion.prawapi import configure_reddit
+from src.ingestion.reddit_stream import RedditStream, load_checkpoint
+
+
+class ListingSession(requests.Session):
+    """
+    Serves r/replay/new from a timeline of submissions, honouring "before" like Reddit does.
+
+    Items become visible ``step`` at a time per request, as if they were being
+    posted. A "before" anchor that is not listed (e.g. deleted) gets an empty page.
+    """
+
+    def __init__(self, count, visible, step):
+        super().__init__()
+        self.timeline = [
+            {"kind": "t3", "data": {
+                "id": f"r{n}", "name": f"t3_r{n}", "title": f"post {n}", "selftext": "",
+                "url": f"https://example.com/{n}", "subreddit": "replay", "score": 1,
+                "num_comments": 0, "stickied": False, "author": "replay",
+                "created_utc": 1_700_000_000 + n,
+            }}
+            for n in range(count)
+        ]
+        self.visible = visible
+        self.step = step
+        self.deleted = set()
+
+    def shown(self):
+        return [item for item in self.timeline[: self.visible]
+                if item["data"]["name"] not in self.deleted]
+
+    def request(self, method, url, *args, params=None, **kwargs):
+        parsed = urlparse(url)
+        if parsed.path.endswith("/access_token"):
+            body = {"access_token": "replay", "expires_in": 3600,
+                    "scope": "*", "token_type": "bearer"}
+        else:
+            params = {**{k: v[0] for k, v in parse_qs(parsed.query).items()},
+                      **(params or {})}
+            shown = self.shown()
+            self.visible = min(len(self.timeline), self.visible + self.step)
+            limit = int(params.get("limit", 100))
+            names = [item["data"]["name"] for item in shown]
+            if params.get("before"):
+                if params["before"] in names:
+                    start = names.index(params["before"]) + 1
+                    page = shown[start: start + limit]
+                else:
+                    page = []
+            else:
+                page = shown[-limit:]
+            body = {"kind": "Listing", "data": {
+                "after": None, "before": None, "children": page[::-1]}}
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response.headers["content-type"] = "application/json"
+        response._content = json.dumps(body).encode("utf-8")
+        return response
+
+
+@pytest.fixture
+def listing(mongo):
+    def _configure(count, visible, step=0):
+        session = ListingSession(count, visible, step)
+        configure_reddit(
+            client_id="replay", client_secret="replay", user_agent="replay",
+            username="replay", password="replay", requestor_kwargs={"session": session},
+        )
+        return session
+    return _configure
+
+
+def run_stream(stored, sink=None, max_items=None, timeout=10, **kwargs):
+    """
+    Runs a replay stream until max_items are stored or timeout seconds pass.
+    """
+    def _store(items):
+        stored.extend(item.id for item in items)
+
+    stream = RedditStream(
+        "replay", kinds=["submissions"], sink=sink or _store, queue_size=5,
+        poll_interval=0.01, batch_size=5, **kwargs,
+    )
+    stop = threading.Event()
+    timer = threading.Timer(timeout, stop.set)
+    timer.start()
+    try:
+        return stream.run(stop, max_items=max_items)
+    finally:
+        timer.cancel()
+
+
+def test_restart_resumes_from_checkpoint_without_gaps_or_duplicates(listing):
+    session = listing(count=60, visible=10, step=7)
+    stored = []
+
+    def _slow_sink(items):
+        time.sleep(0.01 * len(items))  # downstream stages slower than Reddit
+        stored.extend(item.id for item in items)
+
+    run_stream(stored, sink=_slow_sink, max_items=15)
+    assert load_checkpoint("submissions:replay")[0] is not None
+    run_stream(stored, sink=_slow_sink, max_items=60 - len(stored))
+
+    expected = [item["data"]["id"] for item in session.timeline]
+    assert stored == expected
+
+
+def test_deleted_anchor_resyncs_from_newest_page(listing):
+    session = listing(count=30, visible=10)
+    stored = []
+
+    def _sink(items):
+        stored.extend(item.id for item in items)
+        if "r9" in stored and session.visible == 10:
+            # The newest handled item disappears, then new posts arrive
+            session.deleted.add("t3_r9")
+            session.visible = 30
+
+    stats = run_stream(stored, sink=_sink, max_items=30, resync_polls=2)
+
+    assert stats["resyncs"] >= 1
+    assert stored == [f"r{n}" for n in range(30)]
+
+
+def test_deleted_checkpoint_after_restart_skips_older_items(listing):
+    session = listing(count=30, visible=10)
+    stored = []
+    run_stream(stored, max_items=10)
+    assert stored == [f"r{n}" for n in range(10)]
+
+    session.deleted.add("t3_r9")
+    session.visible = 30
+    stats = run_stream(stored, max_items=20, resync_polls=2)
+
+    assert stats["resyncs"] >= 1
+    assert stored == [f"r{n}" for n in range(30)]
@@ -0,0 +1,69 @@
+import asyncio
+import threading
+
+import pytest
+
+pytest.importorskip("google.generativeai")
+
+from src.preprocessing.summarization_engine import (  # noqa: E402
+    ConcurrencyLimiter, SummarizationEngine)
+
+
+class CountingBackend:
+    """
+    Backend that records how many requests are in flight at once.
+    """
+
+    model_name = "counting"
+
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    async def generate(self, prompt):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.02)
+        with self._lock:
+            self.in_flight -= 1
+        return "summary"
+
+
+def test_concurrency_limit_is_shared_across_threads_and_loops():
+    backend = CountingBackend()
+    engine = SummarizationEngine(backend, concurrency=3, requests_per_minute=60_000)
+
+    # As in summarize_texts: each batch runs its own event loop on a worker thread
+    def batch():
+        results = asyncio.run(engine.summarize_many(["text"] * 10))
+        assert results == ["summary"] * 10
+
+    threads = [threading.Thread(target=batch) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert backend.max_in_flight == 3
+    assert engine.limiter.in_use == 0
+
+
+def test_cancelled_waiter_does_not_leak_its_slot():
+    limiter = ConcurrencyLimiter(1)
+
+    async def main():
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        limiter.release()  # hands the slot to the waiter ...
+        waiter.cancel()    # ... which is cancelled before it runs
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        await asyncio.sleep(0)
+        async with limiter:
+            return limiter.in_use
+
+    assert asyncio.run(main()) == 1
+    assert limiter.in_use == 0